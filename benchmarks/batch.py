@@ -0,0 +1,106 @@
+"""
+Batch benchmark against the replay backend.
+
+Researches `--corridors` corridors one `ainvoke` at a time with caches disabled, as the
+nightly job used to, then through `run_batch` at each `--concurrency` with the search and
+LLM caches on, and reports throughput, how many searches reached the backend and how many
+were merged into one already in flight.
+
+Usage:
+    python -m benchmarks.batch [--corridors 40] [--concurrency 4 16]
+        [--llm-latency 0.2] [--search-latency 0.3]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import tempfile
+
+from benchmarks.graph import NO_CACHE
+from benchmarks.replay import DEFAULT_FIXTURES, ReplayLLM, ReplaySearchClient, load_fixtures
+from src.batch import run_batch
+from src.cache import get_search_cache
+from src.configuration import Configuration
+from src.graph import build_app
+from src.llm_cache import get_llm_cache
+
+NATIONALITIES = ["Kenya", "Nigeria", "India", "Brazil", "Mexico", "Egypt", "Ghana", "China"]
+DESTINATIONS = ["United Kingdom", "Japan", "Germany", "Canada", "France"]
+
+
+def make_corridors(count: int) -> list[dict]:
+    pairs = itertools.cycle(itertools.product(NATIONALITIES, DESTINATIONS))
+    return [
+        {"nationality": nationality, "destination": destination}
+        for nationality, destination in itertools.islice(pairs, count)
+    ]
+
+
+async def run_mode(
+    corridors: list[dict], concurrency: int, configurable: dict, fixtures: dict, args
+) -> tuple[float, int, int]:
+    """Run a batch in a fresh output file; returns (corridors/s, backend searches, merged searches)"""
+    search_client = ReplaySearchClient(fixtures, latency=args.search_latency)
+    app = build_app(
+        llm=ReplayLLM(fixtures, latency=args.llm_latency), search_client=search_client
+    )
+    configuration = Configuration.from_runnable_config({"configurable": configurable})
+    search_cache = get_search_cache(
+        configuration.search_cache_backend,
+        configuration.search_cache_path,
+        configuration.search_cache_ttl,
+        configuration.search_cache_max_entries,
+    )
+    if search_cache.backend is not None:
+        search_cache.backend.clear()
+    llm_cache = get_llm_cache(
+        configuration.llm_cache_backend,
+        configuration.llm_cache_max_entries,
+        configuration.llm_cache_ttl,
+        configuration.llm_cache_similarity_threshold if configuration.llm_cache_semantic else None,
+    )
+    if llm_cache is not None:
+        llm_cache.exact.clear()
+    merged_before = search_cache.merged
+
+    with tempfile.TemporaryDirectory() as directory:
+        stats = await run_batch(
+            app, corridors, os.path.join(directory, "results.jsonl"), concurrency, configurable
+        )
+    return stats.throughput, search_client.calls, search_cache.merged - merged_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corridors", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    corridors = make_corridors(args.corridors)
+    # Reports and sources persisted by an earlier mode would answer whole corridors, so only
+    # the search and LLM caches (cleared before each mode) are shared within a batch
+    no_reuse = {
+        "corridor_cache_backend": "none",
+        "knowledge_base_backend": "none",
+        "vector_store_backend": "none",
+    }
+    modes = [("sequential, no caches", 1, NO_CACHE)] + [
+        (f"batch x{concurrency}", concurrency, no_reuse) for concurrency in args.concurrency
+    ]
+
+    print(f"{len(corridors)} corridors\n")
+    print(f"{'mode':<24}{'corridors/s':>12}{'searches':>10}{'merged':>8}")
+    for name, concurrency, configurable in modes:
+        throughput, searches, merged = asyncio.run(
+            run_mode(corridors, concurrency, {**no_reuse, **configurable}, fixtures, args)
+        )
+        print(f"{name:<24}{throughput:>12.2f}{searches:>10}{merged:>8}")
+
+
+if __name__ == "__main__":
+    main()
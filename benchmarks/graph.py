@@ -0,0 +1,191 @@
+"""
+End-to-end graph benchmark against the replay backend.
+
+Reports per-node wall time, throughput at N concurrent conversations, peak Python memory,
+and token, reflection-round and speculation counts from the in-memory telemetry spans.
+Caches and the knowledge base are disabled unless --cache is given, so every conversation
+does the full amount of work.
+
+Usage:
+    python -m benchmarks.graph [--conversations 20] [--concurrency 1 4 16]
+        [--llm-latency 0.5] [--search-latency 0.8] [--set parallel_research=true ...]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Optional
+
+from langchain_core.messages import HumanMessage
+
+from benchmarks.replay import DEFAULT_FIXTURES, ReplayLLM, ReplaySearchClient, load_fixtures
+from src.graph import build_app
+from src.telemetry import get_exporter
+
+NO_CACHE = {
+    "search_cache_backend": "none",
+    "llm_cache_backend": "none",
+    "corridor_cache_backend": "none",
+    "knowledge_base_backend": "none",
+    "vector_store_backend": "none",
+}
+
+DEFAULT_MESSAGE = "I'm Kenyan and I want to visit the United Kingdom. What do I need?"
+
+
+async def run_conversation(
+    app, configurable: dict, message: str, node_times: dict[str, list[float]]
+) -> float:
+    """Run one conversation, adding each node's wall time to node_times; returns total seconds"""
+    started = time.perf_counter()
+    task_starts: dict[str, datetime] = {}
+    async for event in app.astream(
+        {"messages": [HumanMessage(content=message)]},
+        {"configurable": configurable},
+        stream_mode="debug",
+    ):
+        payload = event["payload"]
+        timestamp = datetime.fromisoformat(event["timestamp"])
+        if event["type"] == "task":
+            task_starts[payload["id"]] = timestamp
+        elif event["type"] == "task_result" and payload["id"] in task_starts:
+            elapsed = timestamp - task_starts.pop(payload["id"])
+            node_times[payload["name"]].append(elapsed.total_seconds())
+    return time.perf_counter() - started
+
+
+async def run_benchmark(
+    configurable: dict,
+    conversations: int = 20,
+    concurrency: int = 1,
+    llm_latency: float = 0.0,
+    token_latency: float = 0.0,
+    search_latency: float = 0.0,
+    fixtures_path: str = DEFAULT_FIXTURES,
+    message: str = DEFAULT_MESSAGE,
+    llm: Optional[Any] = None,
+) -> dict:
+    """
+    Run conversations through the graph with at most `concurrency` in flight.
+
+    Returns:
+        dict: Latencies, throughput, per-node times, peak memory and backend call counts
+    """
+    fixtures = load_fixtures(fixtures_path)
+    llm = llm or ReplayLLM(fixtures, latency=llm_latency, token_latency=token_latency)
+    search_client = ReplaySearchClient(fixtures, latency=search_latency)
+    app = build_app(llm=llm, search_client=search_client)
+    configurable = {"telemetry_exporter": "memory", **configurable}
+    exporter = get_exporter(configurable["telemetry_exporter"])
+    if hasattr(exporter, "clear"):
+        exporter.clear()
+
+    node_times: dict[str, list[float]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded() -> float:
+        async with semaphore:
+            return await run_conversation(app, configurable, message, node_times)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(bounded() for _ in range(conversations)))
+    elapsed = time.perf_counter() - started
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    spans = getattr(exporter, "spans", [])
+    reflections = [span for span in spans if span.name == "reflection"]
+
+    return {
+        "conversations": conversations,
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "throughput_per_s": conversations / elapsed,
+        "latency_p50_s": statistics.median(latencies),
+        "latency_max_s": max(latencies),
+        "node_times": dict(node_times),
+        "peak_memory_mb": peak_memory / 1024 / 1024,
+        "llm_calls": dict(getattr(llm, "calls", {})),
+        "search_calls": search_client.calls,
+        "prompt_tokens": sum(span.attributes.get("prompt_tokens", 0) for span in spans),
+        "completion_tokens": sum(span.attributes.get("completion_tokens", 0) for span in spans),
+        "reflection_rounds": len(reflections) / conversations,
+        "speculation": {
+            outcome: sum(span.attributes.get(f"speculation_{outcome}", 0) for span in spans)
+            for outcome in ("started", "used", "wasted")
+        },
+    }
+
+
+def parse_settings(settings: list[str]) -> dict:
+    """Parse key=value configuration overrides"""
+    values = {}
+    for setting in settings:
+        key, _, value = setting.partition("=")
+        values[key] = value
+    return values
+
+
+def print_report(result: dict) -> None:
+    print(
+        f"\nconcurrency {result['concurrency']}: {result['conversations']} conversations in "
+        f"{result['elapsed_s']:.2f}s -> {result['throughput_per_s']:.2f} conv/s, "
+        f"p50 {result['latency_p50_s'] * 1000:.0f} ms, max {result['latency_max_s'] * 1000:.0f} ms, "
+        f"peak memory {result['peak_memory_mb']:.1f} MB"
+    )
+    print(f"  llm calls {result['llm_calls']}, searches {result['search_calls']}")
+    print(
+        f"  tokens {result['prompt_tokens']} prompt / {result['completion_tokens']} completion, "
+        f"{result['reflection_rounds']:.1f} reflection rounds per conversation"
+    )
+    speculation = result["speculation"]
+    if speculation["started"]:
+        print(
+            f"  speculative queries: {speculation['started']} started, {speculation['used']} used, "
+            f"{speculation['wasted'] / speculation['started']:.0%} wasted"
+        )
+    print(f"  {'node':<22}{'calls':>7}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}")
+    for node, times in result["node_times"].items():
+        print(
+            f"  {node:<22}{len(times):>7}{statistics.mean(times) * 1000:>10.1f}"
+            f"{statistics.median(times) * 1000:>10.1f}{max(times) * 1000:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--search-latency", type=float, default=0.0)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--cache", action="store_true", help="keep the caches enabled")
+    parser.add_argument("--set", nargs="*", default=[], help="configuration overrides, key=value")
+    args = parser.parse_args()
+
+    configurable = {} if args.cache else dict(NO_CACHE)
+    configurable.update(parse_settings(args.set))
+
+    for concurrency in args.concurrency:
+        result = asyncio.run(
+            run_benchmark(
+                configurable,
+                conversations=args.conversations,
+                concurrency=concurrency,
+                llm_latency=args.llm_latency,
+                token_latency=args.token_latency,
+                search_latency=args.search_latency,
+                fixtures_path=args.fixtures,
+            )
+        )
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
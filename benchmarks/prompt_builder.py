@@ -0,0 +1,137 @@
+"""
+Prompt assembly benchmark on synthetic sources and notes.
+
+Formats `--sources` sources (a tenth of them without raw_content) and as many research
+notes with the previous string-concatenation code and with `src.prompt_builder`, checks
+both produce the same prompt, and reports the median time of each.
+
+Usage:
+    python -m benchmarks.prompt_builder [--sources 50 100 250 500] [--repeat 5]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import random
+import statistics
+import time
+
+from src.prompt_builder import format_all_notes, format_sources
+from src.tokens import allocate_token_budget, select_passages, truncate_to_tokens
+
+WORDS = (
+    "visa passport entry requirements embassy application fee processing days validity "
+    "months health vaccination insurance customs advisory safety border arrival transit "
+    "residence permit tourist business biometric appointment documents invitation"
+).split()
+
+
+def synthetic_text(rng: random.Random, paragraphs: int) -> str:
+    return "\n\n".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) for _ in range(paragraphs)
+    )
+
+
+def make_sources(count: int) -> list[dict]:
+    rng = random.Random(count)
+    return [
+        {
+            "title": f"Source {number}",
+            "url": f"https://example.com/{number}",
+            "content": synthetic_text(rng, 1),
+            "raw_content": None if number % 10 == 0 else synthetic_text(rng, 12),
+            "score": rng.random(),
+        }
+        for number in range(count)
+    ]
+
+
+def concat_sources(sources_list, include_raw_content=True, query=None, token_budget=None):
+    """`format_sources` as it was before `src.prompt_builder`"""
+    if include_raw_content and token_budget is not None:
+        budgets = allocate_token_budget(sources_list, token_budget)
+    else:
+        budgets = [1000] * len(sources_list)
+
+    formatted_text = "Sources:\n\n"
+    for source, source_budget in zip(sources_list, budgets):
+        formatted_text += f"Source {source['title']}:\n===\n"
+        formatted_text += f"URL: {source['url']}\n===\n"
+        formatted_text += f"Most relevant content from source: {source['content']}\n===\n"
+        if include_raw_content:
+            raw_content = source.get("raw_content", "")
+            if raw_content is None:
+                raw_content = ""
+                print(f"Warning: No raw_content found for source {source['url']}")
+            if query:
+                limited_content = select_passages(raw_content, query, source_budget)
+            else:
+                limited_content = truncate_to_tokens(raw_content, source_budget)
+            if limited_content != raw_content:
+                limited_content += "... [truncated]"
+            formatted_text += f"Full source content limited to {source_budget} tokens: {limited_content}\n\n"
+    return formatted_text.strip()
+
+
+def concat_notes(completed_notes):
+    """`format_all_notes` as it was before `src.prompt_builder`"""
+    formatted_str = ""
+    for idx, company_notes in enumerate(completed_notes, 1):
+        formatted_str += f"""
+{'='*60}
+Note: {idx}:
+{'='*60}
+Notes from research:
+{company_notes}"""
+    return formatted_str
+
+
+def median_seconds(function, repeat: int) -> tuple[float, str]:
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sources", type=int, nargs="+", default=[50, 100, 250, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--token-budget", type=int, default=None)
+    parser.add_argument("--query", default="visa requirements tourist entry")
+    args = parser.parse_args()
+
+    # Keep the old code's per-source warnings and the new log lines out of the table
+    logging.disable(logging.WARNING)
+    print(f"{'sources':>8}{'prompt KB':>11}{'concat ms':>11}{'builder ms':>12}"
+          f"{'notes concat':>14}{'notes builder':>15}")
+    with open(os.devnull, "w") as devnull:
+        for count in args.sources:
+            sources = make_sources(count)
+            notes = [source["content"] * 4 for source in sources]
+            kwargs = {"query": args.query, "token_budget": args.token_budget}
+            with contextlib.redirect_stdout(devnull):
+                concat_time, expected = median_seconds(
+                    lambda: concat_sources(sources, **kwargs), args.repeat
+                )
+            builder_time, prompt = median_seconds(
+                lambda: format_sources(sources, **kwargs), args.repeat
+            )
+            assert prompt == expected, "prompts differ"
+            prompt_kb = len(prompt) / 1024
+            notes_concat, expected = median_seconds(lambda: concat_notes(notes), args.repeat)
+            notes_builder, notes_prompt = median_seconds(
+                lambda: format_all_notes(notes), args.repeat
+            )
+            assert notes_prompt == expected, "notes differ"
+            print(
+                f"{count:>8}{prompt_kb:>11.0f}{concat_time * 1000:>11.1f}"
+                f"{builder_time * 1000:>12.1f}{notes_concat * 1000:>14.2f}{notes_builder * 1000:>15.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
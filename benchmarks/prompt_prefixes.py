@@ -0,0 +1,83 @@
+"""
+Prompt prefix check: runs different conversations through the graph against the replay
+backend and reports, per node, the hashes of the system prompt prefixes sent to the LLM.
+
+A node whose prefixes differ between conversations puts volatile values into its system
+prompt, so the provider cannot reuse the cached prefix. A node may have a few prefixes
+(e.g. the first and incremental extraction prompts) as long as every conversation uses
+the same ones. Exits with status 1 when any node's prefixes are unstable.
+
+The heuristic router and the completeness check are turned off by default (see
+`CHECK_SETTINGS`) so the agent and reflection call the LLM on every conversation.
+
+Usage:
+    python -m benchmarks.prompt_prefixes [--set assistant_role=... ...]
+"""
+
+import argparse
+import asyncio
+import sys
+from collections import defaultdict
+
+from benchmarks.graph import NO_CACHE, parse_settings, run_conversation
+from benchmarks.replay import DEFAULT_FIXTURES, ReplayLLM, ReplaySearchClient, load_fixtures
+from src.graph import build_app
+from src.telemetry import get_exporter
+
+# Send every sample through the LLM nodes the router and the completeness check would skip
+CHECK_SETTINGS = {"router_confidence_threshold": 2, "completeness_threshold": 2}
+
+MESSAGES = [
+    "I'm Kenyan and I want to visit the United Kingdom. What do I need?",
+    "I have a Nigerian passport and I'm travelling to Germany next month for work.",
+    "What documents does an Indian citizen need for a holiday in Japan?",
+]
+
+
+async def collect_prefixes(
+    configurable: dict, fixtures_path: str = DEFAULT_FIXTURES
+) -> list[dict[str, set[str]]]:
+    """Run every sample conversation and return, per conversation, the prefix hashes per node"""
+    fixtures = load_fixtures(fixtures_path)
+    app = build_app(llm=ReplayLLM(fixtures), search_client=ReplaySearchClient(fixtures))
+    exporter = get_exporter("memory")
+    configurable = {**configurable, "telemetry_exporter": "memory"}
+
+    conversations = []
+    for message in MESSAGES:
+        exporter.clear()
+        await run_conversation(app, configurable, message, defaultdict(list))
+        prefixes: dict[str, set[str]] = defaultdict(set)
+        for span in exporter.spans:
+            if "prompt_prefix_hashes" in span.attributes:
+                prefixes[span.name].update(span.attributes["prompt_prefix_hashes"])
+        conversations.append(prefixes)
+    return conversations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--set", nargs="*", default=[], help="configuration overrides, key=value")
+    args = parser.parse_args()
+
+    configurable = {**NO_CACHE, **CHECK_SETTINGS, **parse_settings(args.set)}
+    conversations = asyncio.run(collect_prefixes(configurable, args.fixtures))
+
+    nodes = dict.fromkeys(node for prefixes in conversations for node in prefixes)
+    unstable = []
+    print(f"{'node':<22}{'prefixes':>9}  hashes")
+    for node in nodes:
+        seen = [frozenset(prefixes.get(node, ())) for prefixes in conversations]
+        hashes = set().union(*seen)
+        print(f"{node:<22}{len(hashes):>9}  {', '.join(sorted(hashes))}")
+        if len(set(seen)) > 1:
+            unstable.append(node)
+
+    if unstable:
+        print(f"\nUnstable prompt prefixes: {', '.join(unstable)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
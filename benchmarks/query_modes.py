@@ -0,0 +1,120 @@
+"""
+Query generation mode benchmark: "separate" vs "combined" (see `query_generation_mode`).
+
+Runs the same conversations through the graph in each mode against the replay backend,
+with the heuristic router off so every turn goes through the agent's LLM call, and
+reports end-to-end latency, LLM calls and the quality of the first round of search
+queries:
+
+- queries: search queries written per request
+- corridor: share of queries naming both the traveller's country and the destination
+- sections: share of the report sections (visa, passport, advisory, documents) the
+  queries ask about between them
+- distinct: share of queries that are not a normalized duplicate of another
+
+With the default fixtures both modes replay the same recorded queries, so quality only
+differs on fixtures recorded from the live model in each mode (`RecordingLLM`).
+
+Usage:
+    python -m benchmarks.query_modes [--conversations 10] [--llm-latency 0.5]
+        [--fixtures fixtures/recorded.json]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from langchain_core.messages import HumanMessage
+
+from benchmarks.graph import DEFAULT_MESSAGE, NO_CACHE
+from benchmarks.replay import DEFAULT_FIXTURES, ReplayLLM, ReplaySearchClient, load_fixtures
+from src.cache import normalize_query
+from src.corridor import SECTIONS
+from src.graph import build_app
+from src.router import canonical_country, find_countries, find_sections
+
+MODES = ["separate", "combined"]
+
+
+def query_quality(queries: list[str], nationality: str, destination: str) -> dict:
+    """Quality measures of one request's search queries (see module docstring)"""
+    corridor = {canonical_country(nationality), canonical_country(destination)}
+    on_corridor = [
+        query
+        for query in queries
+        if corridor <= {country for country, *_ in find_countries(query)}
+    ]
+    sections = {section for query in queries for section in find_sections(query)}
+    return {
+        "queries": len(queries),
+        "corridor": len(on_corridor) / len(queries) if queries else 0.0,
+        "sections": len(sections & set(SECTIONS)) / len(SECTIONS),
+        "distinct": len({normalize_query(query) for query in queries}) / len(queries)
+        if queries
+        else 0.0,
+    }
+
+
+async def run_mode(mode: str, fixtures: dict, args) -> dict:
+    llm = ReplayLLM(fixtures, latency=args.llm_latency)
+    search_client = ReplaySearchClient(fixtures, latency=args.search_latency)
+    app = build_app(llm=llm, search_client=search_client)
+    configurable = {**NO_CACHE, "router_confidence_threshold": 1.1, "query_generation_mode": mode}
+
+    latencies, qualities = [], []
+    for _ in range(args.conversations):
+        started = time.perf_counter()
+        first_queries, corridor = None, {}
+        async for update in app.astream(
+            {"messages": [HumanMessage(content=args.message)]},
+            {"configurable": configurable},
+            stream_mode="updates",
+        ):
+            for node_update in update.values():
+                if not node_update:
+                    continue
+                for key in ("nationality", "destination"):
+                    if key in node_update:
+                        corridor[key] = node_update[key]
+                if first_queries is None and node_update.get("search_queries"):
+                    first_queries = node_update["search_queries"]
+        latencies.append(time.perf_counter() - started)
+        qualities.append(
+            query_quality(
+                first_queries or [], corridor.get("nationality"), corridor.get("destination")
+            )
+        )
+
+    return {
+        "latency_p50_s": statistics.median(latencies),
+        "llm_calls": sum(llm.calls.values()) / args.conversations,
+        **{key: statistics.mean(quality[key] for quality in qualities) for key in qualities[0]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--search-latency", type=float, default=0.0)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--message", default=DEFAULT_MESSAGE)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    print(
+        f"{'mode':<10}{'p50 ms':>9}{'llm calls':>11}{'queries':>9}{'corridor':>10}"
+        f"{'sections':>10}{'distinct':>10}"
+    )
+    for mode in MODES:
+        result = asyncio.run(run_mode(mode, fixtures, args))
+        print(
+            f"{mode:<10}{result['latency_p50_s'] * 1000:>9.0f}{result['llm_calls']:>11.1f}"
+            f"{result['queries']:>9.1f}{result['corridor']:>10.0%}{result['sections']:>10.0%}"
+            f"{result['distinct']:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Replay backend: serves recorded LLM and Tavily responses so the graph runs offline.
+
+Fixtures are JSON files shaped like `fixtures/recorded.json`:
+
+    {
+        "llm": {"<SchemaName>": [<response>, ...], "text": ["<plain response>", ...]},
+        "search": {"default": <tavily response>, "<query>": <tavily response>, ...}
+    }
+
+Structured and plain responses are served round-robin; searches are matched on the
+normalized query and fall back to "default". Fixtures can be recorded from the live
+clients with `RecordingLLM` and `RecordingSearchClient`.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+from collections import defaultdict
+from typing import Any, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.cache import normalize_query
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_FIXTURES = os.path.join(FIXTURES_DIR, "recorded.json")
+
+
+def load_fixtures(path: str = DEFAULT_FIXTURES) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+class ReplayStructuredLLM:
+    def __init__(self, llm: "ReplayLLM", schema):
+        self.llm = llm
+        self.schema = schema
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        await asyncio.sleep(self.llm.latency)
+        self.llm.calls[self.schema.__name__] += 1
+        return self.schema.model_validate(next(self.llm.responses[self.schema.__name__]))
+
+
+class ReplayLLM:
+    """
+    Chat model serving recorded responses.
+
+    Args:
+        fixtures: Recorded fixtures (see module docstring)
+        latency: Seconds each call takes before its response (or first token) is returned
+        token_latency: Seconds between streamed tokens
+    """
+
+    deployment_name = "replay"
+
+    def __init__(self, fixtures: dict, latency: float = 0.0, token_latency: float = 0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.responses = {
+            name: itertools.cycle(responses) for name, responses in fixtures["llm"].items()
+        }
+        self.calls: dict[str, int] = defaultdict(int)
+
+    def with_structured_output(self, schema, **kwargs):
+        return ReplayStructuredLLM(self, schema)
+
+    def _text(self) -> str:
+        self.calls["text"] += 1
+        return next(self.responses["text"])
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        text = self._text()
+        await asyncio.sleep(self.latency + self.token_latency * len(text.split()))
+        return AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": sum(len(str(message.content).split()) for message in messages),
+                "output_tokens": len(text.split()),
+                "total_tokens": 0,
+            },
+        )
+
+    async def astream(self, messages, config=None, **kwargs):
+        text = self._text()
+        await asyncio.sleep(self.latency)
+        for token in text.split(" "):
+            await asyncio.sleep(self.token_latency)
+            yield AIMessageChunk(content=token + " ")
+
+
+class ReplaySearchClient:
+    """
+    Search client serving recorded Tavily responses.
+
+    Args:
+        fixtures: Recorded fixtures (see module docstring)
+        latency: Seconds each search takes
+    """
+
+    def __init__(self, fixtures: dict, latency: float = 0.0):
+        self.latency = latency
+        self.responses = {
+            normalize_query(query): response for query, response in fixtures["search"].items()
+        }
+        self.calls = 0
+
+    async def search(self, query: str, **kwargs) -> dict:
+        await asyncio.sleep(self.latency)
+        self.calls += 1
+        response = self.responses.get(normalize_query(query), self.responses["default"])
+        return {**response, "query": query}
+
+
+class RecordingLLM:
+    """Wraps a live chat model and records its responses into fixtures"""
+
+    def __init__(self, llm: Any, fixtures: Optional[dict] = None):
+        self.llm = llm
+        self.fixtures = fixtures if fixtures is not None else {"llm": {}, "search": {}}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def _record(self, name: str, response: Any) -> None:
+        self.fixtures["llm"].setdefault(name, []).append(response)
+
+    def with_structured_output(self, schema, **kwargs):
+        recorder = self
+        structured_llm = self.llm.with_structured_output(schema, **kwargs)
+
+        class _Recording:
+            async def ainvoke(self, *args, **kwargs):
+                response = await structured_llm.ainvoke(*args, **kwargs)
+                parsed = response["parsed"] if isinstance(response, dict) else response
+                recorder._record(schema.__name__, parsed.model_dump())
+                return response
+
+        return _Recording()
+
+    async def ainvoke(self, *args, **kwargs):
+        response = await self.llm.ainvoke(*args, **kwargs)
+        self._record("text", str(response.content))
+        return response
+
+    async def astream(self, *args, **kwargs):
+        content = ""
+        async for chunk in self.llm.astream(*args, **kwargs):
+            content += str(chunk.content)
+            yield chunk
+        self._record("text", content)
+
+
+class RecordingSearchClient:
+    """Wraps a live search client and records its responses into fixtures"""
+
+    def __init__(self, client: Any, fixtures: dict):
+        self.client = client
+        self.fixtures = fixtures
+
+    async def search(self, query: str, **kwargs) -> dict:
+        response = await self.client.search(query, **kwargs)
+        self.fixtures["search"].setdefault("default", response)
+        self.fixtures["search"][query] = response
+        return response
+
+
+def save_fixtures(fixtures: dict, path: str) -> None:
+    with open(path, "w") as file:
+        json.dump(fixtures, file, indent=2)
@@ -0,0 +1,76 @@
+"""
+Heuristic router benchmark on the labelled messages in `fixtures/router_samples.json`.
+
+For each confidence threshold, reports the share of messages routed without the LLM
+(coverage), how many of those were routed correctly (kind, and for corridors the
+nationality and destination), and the classification latency.
+
+Usage:
+    python -m benchmarks.router [--thresholds 0.5 0.85 0.9 0.95] [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from benchmarks.replay import FIXTURES_DIR
+from src.router import classify_message
+
+DEFAULT_SAMPLES = os.path.join(FIXTURES_DIR, "router_samples.json")
+
+
+def is_correct(sample: dict, decision) -> bool:
+    if decision.kind != sample["label"]:
+        return False
+    if decision.kind == "corridor":
+        return (
+            decision.nationality == sample["nationality"]
+            and decision.destination == sample["destination"]
+        )
+    return True
+
+
+def run_benchmark(samples: list[dict], thresholds: list[float], repeat: int) -> None:
+    latencies = []
+    for sample in samples:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            classify_message(sample["message"])
+        latencies.append((time.perf_counter() - started) / repeat)
+
+    decisions = [classify_message(sample["message"]) for sample in samples]
+    print(
+        f"{len(samples)} samples, classification mean {statistics.mean(latencies) * 1e6:.0f} us, "
+        f"max {max(latencies) * 1e6:.0f} us\n"
+    )
+    print(f"{'threshold':>10}{'coverage':>10}{'accuracy':>10}  misrouted")
+    for threshold in thresholds:
+        routed = [
+            (sample, decision)
+            for sample, decision in zip(samples, decisions)
+            if decision.kind != "ambiguous" and decision.confidence >= threshold
+        ]
+        wrong = [sample["message"] for sample, decision in routed if not is_correct(sample, decision)]
+        accuracy = 1 - len(wrong) / len(routed) if routed else 1.0
+        print(
+            f"{threshold:>10.2f}{len(routed) / len(samples):>10.0%}{accuracy:>10.0%}  "
+            f"{'; '.join(wrong)}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", default=DEFAULT_SAMPLES)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.85, 0.9, 0.95])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.samples) as file:
+        samples = json.load(file)
+    run_benchmark(samples, args.thresholds, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Startup benchmark: time to `import src.graph` and latency of the first graph invocation.
+
+Each sample runs in a fresh interpreter without credentials, using the replay backend for
+the invocation, so it measures our own startup cost rather than the network.
+
+Usage:
+    python -m benchmarks.startup [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE = """
+import asyncio, json, time
+start = time.perf_counter()
+import src.graph
+imported = time.perf_counter()
+
+from langchain_core.messages import HumanMessage
+from benchmarks.replay import ReplayLLM, ReplaySearchClient, load_fixtures
+
+fixtures = load_fixtures()
+app = src.graph.build_app(llm=ReplayLLM(fixtures), search_client=ReplaySearchClient(fixtures))
+built = time.perf_counter()
+asyncio.run(app.ainvoke(
+    {"messages": [HumanMessage(content="I'm Kenyan, what do I need to visit the UK?")]},
+    {"configurable": {"search_cache_backend": "none", "corridor_cache_backend": "none"}},
+))
+invoked = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "build_s": built - imported,
+    "first_invoke_s": invoked - built,
+}))
+"""
+
+
+def run_sample() -> dict:
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(("AZURE_OPENAI", "OPENAI", "TAVILY"))
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", SAMPLE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [run_sample() for _ in range(args.runs)]
+    for metric in ("import_s", "build_s", "first_invoke_s"):
+        values = [sample[metric] for sample in samples]
+        print(
+            f"{metric:>15}: median {statistics.median(values) * 1000:8.1f} ms"
+            f"  min {min(values) * 1000:8.1f} ms  max {max(values) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
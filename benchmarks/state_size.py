@@ -0,0 +1,102 @@
+"""
+State size benchmark: how many bytes a run carries through the graph.
+
+Runs replay conversations with full search results in the state (`source_store_backend`
+"none") and with compact source references ("memory"), and reports per run:
+
+- output: JSON size of the graph output
+- final state: JSON size of the final `AgentState`
+- all steps: summed JSON size of the state after every step, i.e. what a checkpointer
+  storing full snapshots would serialize
+- peak memory: peak Python memory while the conversations ran
+
+Replayed pages are padded to `--page-kb` kilobytes of raw content, as real pages are.
+
+Usage:
+    python -m benchmarks.state_size [--conversations 5] [--page-kb 50]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import tracemalloc
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from benchmarks.graph import DEFAULT_MESSAGE, NO_CACHE
+from benchmarks.replay import DEFAULT_FIXTURES, ReplayLLM, ReplaySearchClient, load_fixtures
+from src.graph import build_app
+
+MODES = {"full sources": "none", "source refs": "memory"}
+
+
+class PaddedSearchClient(ReplaySearchClient):
+    """Replay search client whose results carry `page_bytes` of raw content"""
+
+    def __init__(self, fixtures: dict, page_bytes: int):
+        super().__init__(fixtures)
+        self.page_bytes = page_bytes
+
+    async def search(self, query: str, **kwargs) -> dict:
+        response = await super().search(query, **kwargs)
+        results = []
+        for number, source in enumerate(response.get("results", [])):
+            text = source.get("raw_content") or source.get("content") or query
+            # Distinct per query and result, so deduplication keeps every page
+            page = f"{query} {number} {text} "
+            padded = (page * (self.page_bytes // len(page) + 1))[: self.page_bytes]
+            results.append({**source, "raw_content": padded})
+        return {**response, "results": results}
+
+
+def json_size(value) -> int:
+    return len(json.dumps(value, default=str))
+
+
+async def run_mode(source_store_backend: str, fixtures: dict, args) -> dict:
+    app = build_app(
+        llm=ReplayLLM(fixtures),
+        search_client=PaddedSearchClient(fixtures, args.page_kb * 1024),
+        checkpointer=InMemorySaver(),
+    )
+    configurable = {**NO_CACHE, "source_store_backend": source_store_backend}
+
+    sizes: dict[str, list[int]] = {"output": [], "final state": [], "all steps": []}
+    tracemalloc.start()
+    for number in range(args.conversations):
+        thread_id = f"{source_store_backend}-{number}"
+        config = {"configurable": {**configurable, "thread_id": thread_id}}
+        output = await app.ainvoke({"messages": [HumanMessage(content=DEFAULT_MESSAGE)]}, config)
+        sizes["output"].append(json_size(output))
+        sizes["final state"].append(json_size((await app.aget_state(config)).values))
+        sizes["all steps"].append(
+            sum([json_size(snapshot.values) async for snapshot in app.aget_state_history(config)])
+        )
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        **{name: statistics.mean(values) for name, values in sizes.items()},
+        "peak memory": peak_memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=5)
+    parser.add_argument("--page-kb", type=int, default=50)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    columns = ["output", "final state", "all steps", "peak memory"]
+    print(f"{'':<14}" + "".join(f"{column:>14}" for column in columns))
+    for name, backend in MODES.items():
+        result = asyncio.run(run_mode(backend, fixtures, args))
+        print(f"{name:<14}" + "".join(f"{result[column] / 1024:>11.1f} KB" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
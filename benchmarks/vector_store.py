@@ -0,0 +1,104 @@
+"""
+Vector index benchmark on synthetic source chunks.
+
+Builds an index of `--chunks` chunks in a temporary directory and reports embedding and
+indexing throughput, the latency of single and batched queries, and the time to load the
+index from disk.
+
+Usage:
+    python -m benchmarks.vector_store [--chunks 100000] [--queries 200] [--batch 8]
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+from src.vector_store import HashingEmbeddings, VectorIndex
+
+WORDS = (
+    "visa passport entry requirements embassy application fee processing days validity "
+    "months health vaccination yellow fever insurance customs currency declaration "
+    "advisory safety border arrival departure transit residence permit work study tourist "
+    "business electronic travel authorisation biometric appointment documents invitation"
+).split()
+COUNTRIES = "kenya nigeria india japan brazil germany canada mexico egypt ghana france china".split()
+
+
+def synthetic_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS if rng.random() < 0.8 else COUNTRIES) for _ in range(words))
+
+
+def percentile(samples: list[float], share: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(share * len(samples)))]
+
+
+async def run_benchmark(chunks: int, queries: int, batch: int, dimensions: int) -> None:
+    rng = random.Random(0)
+    embeddings = HashingEmbeddings(dimensions)
+    texts = [synthetic_text(rng, 150) for _ in range(chunks)]
+
+    with tempfile.TemporaryDirectory() as path:
+        index = VectorIndex(path, dimensions)
+        embed_seconds = add_seconds = 0.0
+        for start in range(0, chunks, 1000):
+            batch_texts = texts[start : start + 1000]
+            started = time.perf_counter()
+            vectors = await embeddings.aembed(batch_texts)
+            embed_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            index.add(
+                vectors,
+                [
+                    {
+                        "url": f"https://example.com/{start + offset}",
+                        "title": "",
+                        "text": text,
+                        "source_hash": str(start + offset),
+                    }
+                    for offset, text in enumerate(batch_texts)
+                ],
+            )
+            add_seconds += time.perf_counter() - started
+        print(
+            f"{len(index)} chunks x {dimensions} dims: embed {chunks / embed_seconds:,.0f} chunks/s, "
+            f"add {chunks / add_seconds:,.0f} chunks/s"
+        )
+
+        query_vectors = await embeddings.aembed([synthetic_text(rng, 6) for _ in range(queries)])
+        single = []
+        for vector in query_vectors:
+            started = time.perf_counter()
+            index.search(vector[None, :], 5, max_age_seconds=3600)
+            single.append(time.perf_counter() - started)
+        batched = []
+        for start in range(0, queries, batch):
+            started = time.perf_counter()
+            index.search(query_vectors[start : start + batch], 5, max_age_seconds=3600)
+            batched.append((time.perf_counter() - started) / len(query_vectors[start : start + batch]))
+        print(
+            f"single query: p50 {percentile(single, 0.5) * 1e3:.2f} ms, p99 {percentile(single, 0.99) * 1e3:.2f} ms"
+        )
+        print(
+            f"batch of {batch}: p50 {percentile(batched, 0.5) * 1e3:.2f} ms, "
+            f"p99 {percentile(batched, 0.99) * 1e3:.2f} ms per query"
+        )
+
+        started = time.perf_counter()
+        loaded = VectorIndex(path, dimensions)
+        print(f"load: {time.perf_counter() - started:.2f} s for {len(loaded)} chunks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--dimensions", type=int, default=256)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.chunks, args.queries, args.batch, args.dimensions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+from langchain_core.messages import HumanMessage
+
+from src.router import canonical_country
+
+
+@dataclass
+class BatchStats:
+    """Outcome of a batch run"""
+
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.completed / self.seconds if self.seconds else 0.0
+
+
+def read_corridors(path: str) -> Iterator[dict]:
+    """
+    Stream corridors from a CSV file (with a header row) or a JSONL file.
+
+    Each corridor has a `nationality` and a `destination`, optionally an `origin`, and
+    optionally the `message` to send instead of the one built by `corridor_message`.
+    """
+    with open(path, newline="") as file:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(file):
+                yield {key: value for key, value in row.items() if value}
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def corridor_message(corridor: dict) -> str:
+    """The user message a corridor is researched with"""
+    if corridor.get("message"):
+        return corridor["message"]
+    nationality = canonical_country(corridor["nationality"]) or corridor["nationality"]
+    trip = f"travelling to {corridor['destination']}"
+    if corridor.get("origin"):
+        trip = f"travelling from {corridor['origin']} to {corridor['destination']}"
+    return f"I am a citizen of {nationality} {trip}. What do I need?"
+
+
+def corridor_id(corridor: dict) -> str:
+    """Stable id of a corridor, used to resume a batch"""
+    if corridor.get("message") and not corridor.get("nationality"):
+        return " ".join(corridor["message"].lower().split())
+    return "|".join(
+        canonical_country(corridor.get(field)) or (corridor.get(field) or "").strip().lower()
+        for field in ("nationality", "origin", "destination")
+    )
+
+
+def completed_ids(output_path: str) -> set[str]:
+    """Ids of the corridors an earlier run of the batch wrote a result for"""
+    if not os.path.exists(output_path):
+        return set()
+    ids = set()
+    with open(output_path) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if record.get("error") is None:
+                ids.add(record["id"])
+    return ids
+
+
+async def run_batch(
+    app,
+    corridors: Iterable[dict],
+    output_path: str,
+    concurrency: int = 16,
+    configurable: Optional[dict[str, Any]] = None,
+) -> BatchStats:
+    """
+    Research many corridors through the graph and append each result to a JSONL file.
+
+    At most `concurrency` corridors are in flight, pulled from `corridors` as workers free
+    up, so the input can be a stream. Every run shares the process-wide search, LLM and
+    corridor caches, and concurrent searches for the same query are merged (see
+    `SearchCache`), so corridors researched together pay for common queries once.
+
+    Each result is written as soon as its corridor finishes. Corridors with a result in
+    `output_path` are skipped, so a failed or interrupted batch resumes where it stopped;
+    failed corridors are written with their error and retried on the next run. When the
+    graph has a checkpointer, the retry resumes from the failed run's last completed node;
+    threads are keyed by the output file and the corridor, so a batch writing to another
+    file starts every corridor afresh.
+
+    Args:
+        app: The compiled graph
+        corridors: Corridors to research (see `read_corridors`)
+        output_path: JSONL file the results are appended to
+        concurrency: Max corridors researched at once
+        configurable: Configuration passed to every run
+
+    Returns:
+        BatchStats: Counts of completed, failed and skipped corridors and the elapsed time
+    """
+    stats = BatchStats()
+    done = completed_ids(output_path)
+    pending = iter(corridors)
+    started = time.perf_counter()
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(output_path, "a") as output:
+
+        async def research(corridor: dict) -> None:
+            run_id = corridor_id(corridor)
+            record = {"id": run_id, **corridor, "error": None}
+            run_started = time.perf_counter()
+            # Threads belong to this batch's output file, so only a retry of the same batch
+            # picks a thread up again and a later batch starts new conversations
+            thread_id = f"{os.path.abspath(output_path)}:{run_id}"
+            config = {"configurable": {**(configurable or {}), "thread_id": thread_id}}
+            run_input = {"messages": [HumanMessage(content=corridor_message(corridor))]}
+            try:
+                # A checkpointed run that failed part way carries on from where it stopped
+                if app.checkpointer is not None and (await app.aget_state(config)).next:
+                    run_input = None
+                result = await app.ainvoke(
+                    run_input,
+                    config,
+                    output_keys=["messages", "search_results", "time_to_first_token"],
+                )
+                record["report"] = result["messages"][-1].content
+                record["search_results"] = result.get("search_results")
+                record["time_to_first_token"] = result.get("time_to_first_token")
+                stats.completed += 1
+            except Exception as error:
+                record["error"] = f"{type(error).__name__}: {error}"
+                stats.failed += 1
+            record["seconds"] = time.perf_counter() - run_started
+            output.write(json.dumps(record, default=str) + "\n")
+            output.flush()
+
+        async def worker() -> None:
+            for corridor in pending:
+                if corridor_id(corridor) in done:
+                    stats.skipped += 1
+                    continue
+                # Claimed before the await, so duplicates in the input run once
+                done.add(corridor_id(corridor))
+                await research(corridor)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def main():
+    """
+    Precompute reports for many corridors: `python -m src.batch corridors.csv -o results.jsonl`
+
+    Run it again with the same output file to resume after a failure.
+    """
+    parser = argparse.ArgumentParser(description="Research travel corridors in bulk")
+    parser.add_argument("input", help="CSV or JSONL file of corridors")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--set", nargs="*", default=[], metavar="KEY=VALUE", help="configuration overrides"
+    )
+    args = parser.parse_args()
+
+    from src.graph import build_app
+
+    configurable = dict(setting.partition("=")[::2] for setting in args.set)
+    stats = asyncio.run(
+        run_batch(build_app(), read_corridors(args.input), args.output, args.concurrency, configurable)
+    )
+    print(
+        f"{stats.completed} completed, {stats.failed} failed, {stats.skipped} already done "
+        f"in {stats.seconds:.1f}s ({stats.throughput:.2f} corridors/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
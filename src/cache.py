@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query and collapse its whitespace so trivial variants share a key"""
+    return " ".join(query.lower().split())
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Hash the given parts into a stable cache key"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class InMemoryCache:
+    """
+    Least-recently-used cache with TTL-based eviction.
+
+    Args:
+        max_entries: Number of entries kept before the least recently used one is evicted
+        ttl_seconds: Seconds an entry stays fresh
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400):
+        self.max_entries = int(max_entries)
+        self.ttl_seconds = float(ttl_seconds)
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, created_at: Optional[float] = None) -> None:
+        """Store a value; created_at (default now) is when it was fetched, which its TTL counts from"""
+        with self._lock:
+            self._entries[key] = (time.time() if created_at is None else created_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    On-disk cache backed by a SQLite table. Values must be JSON serializable.
+
+    Args:
+        path: Location of the SQLite database file
+        ttl_seconds: Seconds an entry stays fresh
+        namespace: Table name, so several caches can share one database file
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 86400, namespace: str = "cache"):
+        self.path = path
+        self.ttl_seconds = float(ttl_seconds)
+        self.namespace = namespace
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {namespace} "
+            "(key TEXT PRIMARY KEY, created_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry[1] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[tuple[float, Any]]:
+        """The fresh entry under key as (created_at, value), or None"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT created_at, value FROM {self.namespace} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or time.time() - row[0] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute(f"DELETE FROM {self.namespace} WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            return row[0], json.loads(row[1])
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.namespace} (key, created_at, value) VALUES (?, ?, ?)",
+                (key, time.time(), json.dumps(value)),
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete every expired entry and return how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.namespace} WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.namespace}")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.namespace}").fetchone()[0]
+
+
+class TieredCache:
+    """
+    An in-memory LRU tier in front of an on-disk SQLite tier.
+
+    Disk hits are promoted into memory so repeated lookups stay in process. They keep
+    the time they were stored on disk, so promotion never extends their TTL.
+    """
+
+    def __init__(self, memory: InMemoryCache, disk: SQLiteCache):
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                created_at, value = entry
+                self.memory.set(key, value, created_at=created_at)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+    def __len__(self) -> int:
+        return len(self.disk)
+
+
+class SearchCache:
+    """
+    Cache in front of a search client such as `AsyncTavilyClient`.
+
+    Any object exposing an async `search(query, **kwargs)` method can be used as the client,
+    which makes it easy to swap in a local fake backend.
+
+    Concurrent searches for the same query are merged: the first one runs and the others
+    wait for its response, cache or no cache.
+
+    Args:
+        backend: The cache storing search responses, or None to disable caching
+    """
+
+    def __init__(self, backend: Optional[InMemoryCache | TieredCache] = None):
+        self.backend = backend
+        # Searches merged into one already in flight
+        self.merged = 0
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.backend.stats if self.backend is not None else CacheStats()
+
+    @staticmethod
+    def make_key(
+        query: str, max_results: int, include_raw_content: bool, topic: str
+    ) -> str:
+        return make_cache_key(
+            "search", normalize_query(query), int(max_results), bool(include_raw_content), topic
+        )
+
+    async def search(
+        self,
+        client: Any,
+        query: str,
+        *,
+        max_results: int,
+        include_raw_content: bool = True,
+        topic: str = "general",
+    ) -> dict:
+        """Return the cached response for the query or run the search and cache its response"""
+        key = self.make_key(query, max_results, include_raw_content, topic)
+        if self.backend is not None:
+            cached = self.backend.get(key)
+            if cached is not None:
+                return cached
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.merged += 1
+            # Shielded so a cancelled waiter does not cancel the search the others wait for
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            response = await client.search(
+                query,
+                max_results=max_results,
+                include_raw_content=include_raw_content,
+                topic=topic,
+            )
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # Only waiters see the error; mark it retrieved when there are none
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+        if self.backend is not None:
+            self.backend.set(key, response)
+        future.set_result(response)
+        return response
+
+
+def make_cache_backend(
+    backend: str, path: str, ttl_seconds: float, max_entries: int, namespace: str
+) -> Optional[InMemoryCache | TieredCache]:
+    """
+    Build a cache backend from its configured name.
+
+    Args:
+        backend: "memory" for an in-process LRU, "sqlite" for LRU + SQLite tiers, "none" to disable
+        path: SQLite database path used by the "sqlite" backend
+        ttl_seconds: Seconds an entry stays fresh
+        max_entries: Size of the in-memory LRU tier
+        namespace: SQLite table holding the entries
+    """
+    if backend == "memory":
+        return InMemoryCache(max_entries, ttl_seconds)
+    if backend == "sqlite":
+        return TieredCache(
+            InMemoryCache(max_entries, ttl_seconds),
+            SQLiteCache(path, ttl_seconds, namespace=namespace),
+        )
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+_search_caches: dict[tuple, SearchCache] = {}
+
+
+def get_search_cache(backend: str, path: str, ttl_seconds: float, max_entries: int) -> SearchCache:
+    """Return the process-wide search cache for the given settings (see `make_cache_backend`)"""
+    settings = (backend, path, float(ttl_seconds), int(max_entries))
+    if settings not in _search_caches:
+        _search_caches[settings] = SearchCache(
+            make_cache_backend(backend, path, ttl_seconds, max_entries, "search_results")
+        )
+    return _search_caches[settings]
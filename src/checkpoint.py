@@ -0,0 +1,422 @@
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+# Serialized values at least this large are stored compressed
+COMPRESS_MIN_BYTES = 512
+
+# Key replacing the `raw_content` of a stored search result, holding the hash of its blob
+RAW_CONTENT_REF = "raw_content_ref"
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    Durable checkpointer storing graph state in SQLite, compactly.
+
+    - Deltas: a checkpoint only stores the channels that changed since its parent; the
+      others are referenced by version, as LangGraph tracks them.
+    - Content-addressed blobs: every channel value is stored once per distinct content
+      (zlib-compressed when large), so unchanged values shared by threads or versions
+      cost nothing more.
+    - Search results: the `raw_content` of each source is moved into its own blob and
+      replaced by a reference, so the growing `search_results` list only re-stores the
+      small metadata of earlier sources at each step.
+
+    A run that fails can be resumed from its last completed node by invoking the graph
+    again with `None` as input and the same `thread_id`.
+
+    Args:
+        path: Location of the SQLite database file
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, "
+            "parent_checkpoint_id TEXT, checkpoint TEXT NOT NULL, metadata TEXT NOT NULL, "
+            "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));"
+            "CREATE TABLE IF NOT EXISTS channel_values ("
+            "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL, "
+            "version TEXT NOT NULL, blob TEXT, "
+            "PRIMARY KEY (thread_id, checkpoint_ns, channel, version));"
+            "CREATE TABLE IF NOT EXISTS writes ("
+            "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, "
+            "task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL, "
+            "blob TEXT NOT NULL, task_path TEXT NOT NULL, "
+            "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));"
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "hash TEXT PRIMARY KEY, type TEXT NOT NULL, compressed INTEGER NOT NULL, "
+            "data BLOB NOT NULL);"
+        )
+        self._conn.commit()
+
+    # Blobs
+
+    def _put_blob(self, type_: str, data: bytes) -> str:
+        """Store a serialized value under its content hash and return the hash"""
+        key = hashlib.sha256(type_.encode("utf-8") + b"\0" + data).hexdigest()
+        compressed = len(data) >= COMPRESS_MIN_BYTES
+        self._conn.execute(
+            "INSERT OR IGNORE INTO blobs (hash, type, compressed, data) VALUES (?, ?, ?, ?)",
+            (key, type_, int(compressed), zlib.compress(data) if compressed else data),
+        )
+        return key
+
+    def _get_blob(self, key: str) -> tuple[str, bytes]:
+        type_, compressed, data = self._conn.execute(
+            "SELECT type, compressed, data FROM blobs WHERE hash = ?", (key,)
+        ).fetchone()
+        return type_, zlib.decompress(data) if compressed else data
+
+    def _dump(self, value: Any) -> str:
+        return self._put_blob(*self.serde.dumps_typed(self._compact(value)))
+
+    def _load(self, key: str) -> Any:
+        return self._hydrate(self.serde.loads_typed(self._get_blob(key)))
+
+    def _compact(self, value: Any) -> Any:
+        """Move the raw content of search results into blobs of their own"""
+        if not isinstance(value, list) or not any(
+            isinstance(item, dict) and isinstance(item.get("raw_content"), str) for item in value
+        ):
+            return value
+        compacted = []
+        for item in value:
+            if isinstance(item, dict) and isinstance(item.get("raw_content"), str):
+                item = {**item}
+                raw_content = item.pop("raw_content")
+                item[RAW_CONTENT_REF] = self._put_blob("str", raw_content.encode("utf-8"))
+            compacted.append(item)
+        return compacted
+
+    def _hydrate(self, value: Any) -> Any:
+        if not isinstance(value, list) or not any(
+            isinstance(item, dict) and RAW_CONTENT_REF in item for item in value
+        ):
+            return value
+        hydrated = []
+        for item in value:
+            if isinstance(item, dict) and RAW_CONTENT_REF in item:
+                item = {**item}
+                _, raw_content = self._get_blob(item.pop(RAW_CONTENT_REF))
+                item["raw_content"] = raw_content.decode("utf-8")
+            hydrated.append(item)
+        return hydrated
+
+    # Checkpoints
+
+    def _load_channel_values(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            row = self._conn.execute(
+                "SELECT blob FROM channel_values WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is not None and row[0] is not None:
+                values[channel] = self._load(row[0])
+        return values
+
+    def _load_writes(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> list[tuple[str, str, str, str, int]]:
+        """(task_id, channel, blob hash, task_path, idx) of the writes made on a checkpoint"""
+        return self._conn.execute(
+            "SELECT task_id, channel, blob, task_path, idx FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def _make_tuple(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        parent_checkpoint_id: Optional[str],
+        checkpoint_blob: str,
+        metadata_blob: str,
+    ) -> CheckpointTuple:
+        checkpoint = self._load(checkpoint_blob)
+        sends = []
+        if parent_checkpoint_id:
+            sends = sorted(
+                (
+                    write
+                    for write in self._load_writes(thread_id, checkpoint_ns, parent_checkpoint_id)
+                    if write[1] == TASKS
+                ),
+                key=lambda write: (write[3], write[0], write[4]),
+            )
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_channel_values(
+                    thread_id, checkpoint_ns, checkpoint["channel_versions"]
+                ),
+                "pending_sends": [self._load(write[2]) for write in sends],
+            },
+            metadata=self._load(metadata_blob),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self._load(blob))
+                for task_id, channel, blob, _, _ in self._load_writes(
+                    thread_id, checkpoint_ns, checkpoint_id
+                )
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """The checkpoint with the config's `checkpoint_id`, or the latest of its thread"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            return self._make_tuple(thread_id, checkpoint_ns, *row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Checkpoints matching the config, metadata filter and `before`, newest first"""
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, "
+            "metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params: tuple = ()
+        if config:
+            query += " AND thread_id = ?"
+            params += (config["configurable"]["thread_id"],)
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query += " AND checkpoint_ns = ?"
+                params += (checkpoint_ns,)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params += (checkpoint_id,)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params += (before_checkpoint_id,)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            with self._lock:
+                checkpoint_tuple = self._make_tuple(*row)
+            if filter and not all(
+                checkpoint_tuple.metadata.get(key) == value for key, value in filter.items()
+            ):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint with the values of the channels that changed since its parent"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        stored = {**checkpoint}
+        stored.pop("pending_sends", None)
+        values = stored.pop("channel_values")
+
+        with self._lock:
+            for channel, version in new_versions.items():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO channel_values "
+                    "(thread_id, checkpoint_ns, channel, version, blob) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        channel,
+                        str(version),
+                        self._dump(values[channel]) if channel in values else None,
+                    ),
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_checkpoint_id, checkpoint, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    self._dump(stored),
+                    self._dump(get_checkpoint_metadata(config, metadata)),
+                ),
+            )
+            self._conn.commit()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store the writes of a finished task, so a resumed run does not repeat it"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                # Special writes (errors, interrupts) replace earlier ones; regular writes are kept
+                verb = "INSERT OR REPLACE" if idx < 0 else "INSERT OR IGNORE"
+                self._conn.execute(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, "
+                    "idx, channel, blob, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        task_id,
+                        idx,
+                        channel,
+                        self._dump(value),
+                        task_path,
+                    ),
+                )
+            self._conn.commit()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for checkpoint_tuple in self.list(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        # Zero-padded so versions sort as text, as in LangGraph's own savers
+        if current is None:
+            current_version = 0
+        elif isinstance(current, int):
+            current_version = current
+        else:
+            current_version = int(current.split(".")[0])
+        return f"{current_version + 1:032}.{random.random():016}"
+
+    def size(self) -> dict[str, int]:
+        """Stored blob bytes, and the number of blobs and checkpoints"""
+        with self._lock:
+            return {
+                "blobs": self._conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+                ).fetchone()[0],
+                "blob_count": self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0],
+                "checkpoints": self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0],
+            }
+
+
+_checkpointers: dict[str, SQLiteCheckpointer] = {}
+
+
+def get_checkpointer(backend: str, path: str) -> Optional[SQLiteCheckpointer]:
+    """Return the process-wide checkpointer at path, or None when backend is "none" """
+    if backend == "none":
+        return None
+    if backend != "sqlite":
+        raise ValueError(f"Unknown checkpointer backend: {backend}")
+    if path not in _checkpointers:
+        _checkpointers[path] = SQLiteCheckpointer(path)
+    return _checkpointers[path]
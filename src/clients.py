@@ -0,0 +1,324 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Callable, Optional, Type
+
+import httpx
+from pydantic import BaseModel
+
+from src.configuration import Configuration
+from src.telemetry import record, record_prompt_prefix, record_usage, timed
+
+
+AZURE_DEPLOYMENT = "gpt-4.1-mini"
+
+# Shared clients, built on first use so importing the graph needs neither the
+# heavy client libraries nor credentials. Models and search clients given to
+# `set_llm`/`set_search_client` replace the default ones.
+_llm = None
+_search_client = None
+
+# Limiters, default clients and connection pools, per settings and event loop
+# (see `_for_running_loop`), each stored with the loop it belongs to
+_limiters: dict[tuple, tuple[asyncio.AbstractEventLoop, "OutboundLimiter"]] = {}
+_http_clients: dict[tuple, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+_default_llms: dict[tuple, tuple[asyncio.AbstractEventLoop, Any]] = {}
+_default_search_clients: dict[tuple, tuple[asyncio.AbstractEventLoop, Any]] = {}
+_bound_llms: dict[tuple, tuple[asyncio.AbstractEventLoop, Any]] = {}
+
+
+class OutboundLimiter:
+    """
+    Async context manager bounding outbound calls with a concurrency limit and a token bucket.
+
+    Args:
+        name: Kind of call, used to name the recorded wait time
+        max_concurrency: Max calls in flight at once
+        rate_per_second: Max calls started per second (bursts up to that many), 0 for no limit
+    """
+
+    def __init__(self, name: str, max_concurrency: int, rate_per_second: float = 0):
+        self.name = name
+        self.max_concurrency = int(max_concurrency)
+        self.rate_per_second = float(rate_per_second)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._tokens = max(1.0, self.rate_per_second)
+        self._updated_at = time.monotonic()
+        self._bucket_lock = asyncio.Lock()
+
+    async def _take_token(self) -> None:
+        async with self._bucket_lock:
+            capacity = max(1.0, self.rate_per_second)
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    capacity, self._tokens + (now - self._updated_at) * self.rate_per_second
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+
+    async def __aenter__(self) -> "OutboundLimiter":
+        with timed(f"{self.name}_wait_seconds"):
+            await self._semaphore.acquire()
+            if self.rate_per_second > 0:
+                try:
+                    await self._take_token()
+                except BaseException:
+                    self._semaphore.release()
+                    raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._semaphore.release()
+
+
+def get_limiter(name: str, max_concurrency: int, rate_per_second: float = 0) -> OutboundLimiter:
+    """Return the limiter for a kind of outbound call (e.g. "search" or "llm"), one per event loop"""
+    return _for_running_loop(
+        _limiters,
+        (name, int(max_concurrency), float(rate_per_second)),
+        lambda: OutboundLimiter(name, max_concurrency, rate_per_second),
+    )
+
+
+def _for_running_loop(cache: dict, key: tuple, build: Callable[[], Any]) -> Any:
+    """
+    Return the value cached under key for the running event loop, building it on first use.
+
+    Connections belong to the loop that opened them, so each `asyncio.run` gets its own
+    clients; values of loops that have since closed are dropped.
+    """
+    loop = asyncio.get_running_loop()
+    key = (*key, id(loop))
+    entry = cache.get(key)
+    if entry is None or entry[0] is not loop:
+        for closed in [key for key, (owner, _) in cache.items() if owner.is_closed()]:
+            del cache[closed]
+        entry = cache[key] = (loop, build())
+    return entry[1]
+
+
+def _pool_settings(configuration: Configuration) -> tuple:
+    """Connection pool settings of a configuration, which its pools are keyed by"""
+    return (
+        configuration.http_max_connections,
+        configuration.http_max_keepalive_connections,
+        configuration.http_keepalive_expiry,
+    )
+
+
+def get_http_client(
+    host: str,
+    configuration: Configuration,
+    proxies: Optional[dict[str, str]] = None,
+    **client_kwargs,
+) -> httpx.AsyncClient:
+    """
+    Return the shared keep-alive connection pool for an outbound host, building it on first use.
+
+    There is one pool per host, pool settings and event loop, so runs configured
+    differently or driven by separate `asyncio.run` calls do not share connections.
+
+    Args:
+        host: Name of the pool, one per upstream host
+        configuration: Pool size and keep-alive settings
+        proxies: Proxy URL per URL scheme ("http://", "https://"), pooled with the same limits
+        client_kwargs: Extra arguments for `httpx.AsyncClient` (headers, base_url, ...)
+    """
+    proxies = {scheme: url for scheme, url in (proxies or {}).items() if url}
+
+    def build() -> httpx.AsyncClient:
+        max_connections, max_keepalive_connections, keepalive_expiry = _pool_settings(
+            configuration
+        )
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        mounts = {
+            scheme: httpx.AsyncHTTPTransport(proxy=url, limits=limits)
+            for scheme, url in proxies.items()
+        }
+        return httpx.AsyncClient(limits=limits, mounts=mounts or None, **client_kwargs)
+
+    key = (host, *_pool_settings(configuration), tuple(sorted(proxies.items())))
+    return _for_running_loop(_http_clients, key, build)
+
+
+class _SharedHTTPClient:
+    """Context manager handing out a shared client without closing it on exit"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+
+    async def __aenter__(self) -> httpx.AsyncClient:
+        return self.client
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+
+class LimitedLLM:
+    """Chat model wrapper that holds a limiter slot for the duration of every call"""
+
+    def __init__(self, llm: Any, limiter: OutboundLimiter):
+        self.llm = llm
+        self.limiter = limiter
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        record_prompt_prefix(messages)
+        async with self.limiter:
+            with timed("llm_seconds"):
+                response = await self.llm.ainvoke(messages, *args, **kwargs)
+        record("llm_calls", 1)
+
+        if isinstance(response, dict) and "parsed" in response:
+            # Structured output is bound with include_raw to keep the raw message's token usage
+            record_usage(response["raw"])
+            if response["parsing_error"] is not None:
+                raise response["parsing_error"]
+            return response["parsed"]
+
+        record_usage(response)
+        return response
+
+    async def astream(self, messages, *args, **kwargs):
+        record_prompt_prefix(messages)
+        async with self.limiter:
+            with timed("llm_seconds"):
+                async for chunk in self.llm.astream(messages, *args, **kwargs):
+                    record_usage(chunk)
+                    yield chunk
+        record("llm_calls", 1)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+
+class LimitedSearchClient:
+    """Search client wrapper that holds a limiter slot for the duration of every search"""
+
+    def __init__(self, client: Any, limiter: OutboundLimiter):
+        self.client = client
+        self.limiter = limiter
+
+    async def search(self, query: str, **kwargs) -> dict:
+        async with self.limiter:
+            with timed("search_seconds"):
+                response = await self.client.search(query, **kwargs)
+        record("searches", 1)
+        record("search_results", len(response.get("results", [])))
+        record("search_bytes", len(json.dumps(response)))
+        return response
+
+
+def _get_shared_llm(configuration: Configuration):
+    if _llm is not None:
+        return _llm
+
+    def build():
+        from langchain_openai import AzureChatOpenAI
+
+        return AzureChatOpenAI(
+            azure_deployment=AZURE_DEPLOYMENT,
+            api_version="2024-12-01-preview",
+            temperature=0,
+            http_async_client=get_http_client("azure_openai", configuration),
+        )
+
+    return _for_running_loop(_default_llms, _pool_settings(configuration), build)
+
+
+def _get_shared_search_client(configuration: Configuration):
+    if _search_client is not None:
+        return _search_client
+
+    def build():
+        from tavily import AsyncTavilyClient
+
+        client = AsyncTavilyClient()
+        http_client = get_http_client(
+            "tavily",
+            configuration,
+            # The proxies AsyncTavilyClient would have mounted on its own clients
+            proxies={
+                "http://": os.getenv("TAVILY_HTTP_PROXY"),
+                "https://": os.getenv("TAVILY_HTTPS_PROXY"),
+            },
+            base_url="https://api.tavily.com",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {os.getenv('TAVILY_API_KEY')}",
+            },
+        )
+        # AsyncTavilyClient opens a new connection per request; hand it the shared pool instead
+        client._client_creator = lambda: _SharedHTTPClient(http_client)
+        return client
+
+    return _for_running_loop(_default_search_clients, _pool_settings(configuration), build)
+
+
+def get_llm(configuration: Optional[Configuration] = None) -> LimitedLLM:
+    """Return the shared chat model, built on first use and bounded by the LLM limiter"""
+    configuration = configuration or Configuration()
+    return LimitedLLM(
+        _get_shared_llm(configuration),
+        get_limiter("llm", configuration.max_concurrent_llm_calls, configuration.llm_rate_limit),
+    )
+
+
+def get_search_client(configuration: Optional[Configuration] = None) -> LimitedSearchClient:
+    """Return the shared Tavily client, built on first use and bounded by the search limiter"""
+    configuration = configuration or Configuration()
+    return LimitedSearchClient(
+        _get_shared_search_client(configuration),
+        get_limiter(
+            "search", configuration.max_concurrent_searches, configuration.search_rate_limit
+        ),
+    )
+
+
+def set_llm(llm: Any) -> None:
+    """Use the given chat model instead of the default Azure OpenAI deployment"""
+    global _llm
+    _llm = llm
+    _bound_llms.clear()
+
+
+def set_search_client(client: Any) -> None:
+    """Use the given search client (any object with an async `search` method) instead of Tavily"""
+    global _search_client
+    _search_client = client
+
+
+def get_model_name() -> str:
+    """Name of the shared chat model, used to key cached responses"""
+    if _llm is None:
+        return AZURE_DEPLOYMENT
+    return getattr(_llm, "deployment_name", None) or getattr(_llm, "model_name", "")
+
+
+def _get_bound_llm(schema: Type[BaseModel], configuration: Configuration):
+    """The shared model bound to an output schema, bound once per model and event loop"""
+    llm = _get_shared_llm(configuration)
+    return _for_running_loop(
+        _bound_llms,
+        (id(llm), schema),
+        lambda: llm.with_structured_output(schema, include_raw=True),
+    )
+
+
+def get_structured_llm(
+    schema: Type[BaseModel], configuration: Optional[Configuration] = None
+) -> LimitedLLM:
+    """Return the model bound to the output schema, bound once and reused across calls"""
+    configuration = configuration or Configuration()
+    return LimitedLLM(
+        _get_bound_llm(schema, configuration),
+        get_limiter("llm", configuration.max_concurrent_llm_calls, configuration.llm_rate_limit),
+    )
@@ -0,0 +1,106 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from src.corridor import SECTIONS
+from src.requirements import section_values
+from src.tokens import content_words
+
+# Headings the extracted information uses for each report section, after stripping
+# markdown and numbering (see `DEFAULT_OUTPUT_STRUCTURE`)
+SECTION_HEADINGS = {
+    "visa": re.compile(r"(entry )?visas?( and entry)?( requirements?| information| rules| policy)?"),
+    "passport": re.compile(r"passports?( validity)?( requirements?| information| rules)?"),
+    "advisory": re.compile(
+        r"(travel )?(advisory|advisories|warnings?|safety)( and safety| information)?"
+    ),
+    "documents": re.compile(
+        r"(additional |other |supporting |required )?documents?( required| requirements| needed)?"
+    ),
+}
+
+# Markers of a section the research did not actually fill in
+PLACEHOLDER = re.compile(
+    r"\b(unknown|unclear|n/a|tbd|to be confirmed|no (specific )?information"
+    r"|not (found|available|specified|mentioned|provided))\b",
+    re.IGNORECASE,
+)
+
+# Content words a section needs to count as populated
+MIN_SECTION_WORDS = 5
+
+_HEADING_PREFIX = re.compile(r"^[\s#>*_\-\d.)]+")
+_HEADING_SUFFIX = re.compile(r"[\s*_:#.,]+$")
+
+
+@dataclass
+class Completeness:
+    """Report sections the extracted information covers and those it lacks"""
+
+    covered: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)
+
+    @property
+    def score(self) -> float:
+        total = len(self.covered) + len(self.missing)
+        return len(self.covered) / total if total else 0.0
+
+
+def heading_section(line: str) -> Optional[str]:
+    """The report section a line is the heading of, if it is one"""
+    text = _HEADING_SUFFIX.sub("", _HEADING_PREFIX.sub("", line.replace("**", ""))).lower()
+    for section, pattern in SECTION_HEADINGS.items():
+        if pattern.fullmatch(text):
+            return section
+    return None
+
+
+def split_sections(text: str) -> dict[str, str]:
+    """Body of every report section a text has a heading for; repeated headings are joined"""
+    bodies: dict[str, list[str]] = {}
+    current = None
+    for line in text.splitlines():
+        section = heading_section(line) if len(line) < 80 else None
+        if section is not None:
+            current = section
+            bodies.setdefault(section, [])
+        elif current is not None:
+            bodies[current].append(line)
+    return {section: "\n".join(lines) for section, lines in bodies.items()}
+
+
+def section_covered(info: dict[str, Any] | str, section: str, bodies: dict[str, str]) -> bool:
+    if isinstance(info, dict):
+        values = section_values(info, section)
+        text = " ".join(
+            str(item) for value in values for item in (value if isinstance(value, list) else [value])
+        )
+        return bool(values) and not PLACEHOLDER.search(text)
+    body = bodies.get(section, "")
+    return len(content_words(body)) >= MIN_SECTION_WORDS and not PLACEHOLDER.search(body)
+
+
+def score_completeness(
+    info: dict[str, Any] | str, sections: Optional[list[str]] = None
+) -> Completeness:
+    """
+    Check which report sections the extracted information covers, without an LLM call.
+
+    Structured information (`TravelRequirements`) covers a section when one of the
+    section's fields is populated and none holds a placeholder such as "unknown" or "not
+    found". Text information covers a section when it has a heading for it followed by at
+    least `MIN_SECTION_WORDS` content words and no placeholder; text without section
+    headings covers nothing, leaving the decision to the LLM.
+
+    Args:
+        info: The extracted information
+        sections: Report sections required, all of `SECTIONS` by default
+    """
+    bodies = split_sections(info or "") if not isinstance(info, dict) else {}
+    completeness = Completeness()
+    for section in sections or list(SECTIONS):
+        if section_covered(info, section, bodies):
+            completeness.covered.append(section)
+        else:
+            completeness.missing.append(section)
+    return completeness
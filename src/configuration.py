@@ -47,12 +47,173 @@ class Configuration:
     # Max search results per query
     max_search_results: int = 1
 
-    # Max reflection steps
+    # Tokens of page content shared by all sources in a summarization prompt
+    source_token_budget: int = 2000
+
+    # Tokens of research notes in an extraction prompt, 0 for no limit
+    notes_token_budget: int = 0
+
+    # Max differing SimHash bits for two sources to count as near-duplicates
+    near_duplicate_distance: int = 3
+
+    # Max research loops reflection may start per run
     max_reflection_steps: int = 3
 
+    # Share of the asked-about report sections the extracted info must cover for reflection
+    # to skip its LLM call (above 1 disables it)
+    completeness_threshold: float = 1.0
+
+    # Seconds into a run after which reflection starts no more research loops, 0 for no limit
+    research_time_budget: float = 0
+
+    # Tokens a run may spend before reflection starts no more research loops, 0 for no limit
+    research_token_budget: int = 0
+
     # Whether to include search results in the output
     include_search_results: bool = True
 
+    # Store for the page content of search results, which then carry only a content hash:
+    # "memory", "sqlite" (memory in front of disk) or "none" (full content in the state)
+    source_store_backend: str = "sqlite"
+
+    # Location of the on-disk source store
+    source_store_path: str = ".cache/sources.sqlite"
+
+    # Seconds a stored page content is kept
+    source_store_ttl: int = 2592000
+
+    # Max page contents kept in memory
+    source_store_max_entries: int = 256
+
+    # Search cache backend: "memory", "sqlite" (memory in front of disk) or "none"
+    search_cache_backend: str = "memory"
+
+    # Location of the on-disk search cache
+    search_cache_path: str = ".cache/search_cache.sqlite"
+
+    # Seconds a cached search response stays fresh
+    search_cache_ttl: int = 86400
+
+    # Max search responses kept in the in-memory cache
+    search_cache_max_entries: int = 1024
+
+    # LLM response cache backend for structured-output calls: "memory" or "none"
+    llm_cache_backend: str = "memory"
+
+    # Max LLM responses kept in the cache
+    llm_cache_max_entries: int = 512
+
+    # Seconds a cached LLM response stays fresh
+    llm_cache_ttl: int = 3600
+
+    # Reuse responses for near-duplicate prompts via the LangGraph store's vector index
+    llm_cache_semantic: bool = False
+
+    # Minimum similarity score for a near-duplicate prompt to reuse a response
+    llm_cache_similarity_threshold: float = 0.97
+
+    # Corridor answer cache backend: "memory", "sqlite" (memory in front of disk) or "none"
+    corridor_cache_backend: str = "memory"
+
+    # Location of the on-disk corridor cache
+    corridor_cache_path: str = ".cache/corridor_cache.sqlite"
+
+    # Max corridors kept in the in-memory cache
+    corridor_cache_max_entries: int = 512
+
+    # Hours each report section of a cached corridor stays fresh
+    visa_freshness_hours: float = 72
+
+    passport_freshness_hours: float = 720
+
+    advisory_freshness_hours: float = 6
+
+    documents_freshness_hours: float = 168
+
+    # Local knowledge base consulted before web search: "sqlite" or "none"
+    knowledge_base_backend: str = "sqlite"
+
+    # Location of the knowledge base
+    knowledge_base_path: str = ".cache/knowledge.sqlite"
+
+    # Vector index of fetched source chunks, searched before the web: "numpy" or "none"
+    vector_store_backend: str = "none"
+
+    # Directory of the vector index
+    vector_store_path: str = ".cache/vector_index"
+
+    # Embedding model for the vector index: "hashing" (local, lexical) or "azure"
+    embedding_provider: str = "hashing"
+
+    # Azure OpenAI embedding deployment, used with embedding_provider "azure"
+    embedding_deployment: str = "text-embedding-3-small"
+
+    # Length of the embedding vectors
+    embedding_dimensions: int = 256
+
+    # Chunks retrieved per query
+    retrieval_top_k: int = 5
+
+    # Min cosine similarity of a retrieved chunk to answer a query without a web search
+    retrieval_min_score: float = 0.35
+
+    # Hours an indexed chunk can answer queries, after which it is purged from the index
+    retrieval_max_age_hours: float = 72
+
+    # Max searches in flight at once across the process
+    max_concurrent_searches: int = 8
+
+    # Max LLM calls in flight at once across the process
+    max_concurrent_llm_calls: int = 8
+
+    # Max searches started per second, 0 for no limit
+    search_rate_limit: float = 0
+
+    # Max LLM calls started per second, 0 for no limit
+    llm_rate_limit: float = 0
+
+    # Connection pool size per outbound host (Azure OpenAI, Tavily)
+    http_max_connections: int = 20
+
+    # Idle keep-alive connections kept per outbound host
+    http_max_keepalive_connections: int = 10
+
+    # Seconds an idle keep-alive connection is kept open
+    http_keepalive_expiry: float = 30
+
+    # Stream report tokens as they are generated (custom and messages stream modes)
+    stream_response: bool = True
+
+    # Research each search query in its own parallel branch instead of one combined step
+    parallel_research: bool = False
+
+    # Only research new queries and URLs on reflection loops, and merge only new notes into info
+    incremental_research: bool = False
+
+    # Min heuristic router confidence to answer a turn without the LLM intent check (above 1 disables it)
+    router_confidence_threshold: float = 0.9
+
+    # How search queries are written: "separate" (own LLM call) or "combined" (in the agent's intent check)
+    query_generation_mode: str = "separate"
+
+    # Write search queries for a likely corridor query while the LLM intent check runs
+    speculative_queries: bool = False
+
+    # Min heuristic router confidence to start speculative query writing
+    speculation_min_confidence: float = 0.5
+
+    # Conversation turns the agent sees verbatim; older turns are folded into a rolling summary (0 keeps all)
+    history_window_turns: int = 4
+
+    # Durable checkpoints of every step, read when the graph is built: "sqlite" or "none"
+    checkpointer_backend: str = "none"
+
+    # Location of the checkpoint database
+    checkpoint_path: str = ".cache/checkpoints.sqlite"
+
+    # Where node spans are exported: "none", "memory" or "opentelemetry"
+    telemetry_exporter: str = "none"
+
     @classmethod
     def from_runnable_config(
         cls, config: Optional[RunnableConfig] = None
@@ -62,8 +223,18 @@ class Configuration:
             config["configurable"] if config and "configurable" in config else {}
         )
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
+            f.name: _coerce(os.environ.get(f.name.upper(), configurable.get(f.name)), f.type)
             for f in fields(cls)
             if f.init
         }
-        return cls(**{k: v for k, v in values.items() if v})
+        return cls(**{k: v for k, v in values.items() if v not in (None, "")})
+
+
+def _coerce(value: Any, field_type: type) -> Any:
+    """Convert string values (e.g. from environment variables) to the field type"""
+    if isinstance(value, str):
+        if field_type is bool:
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        if field_type in (int, float):
+            return field_type(value)
+    return value
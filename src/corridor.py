@@ -0,0 +1,202 @@
+import re
+import time
+from typing import Any, Optional
+
+from src.cache import InMemoryCache, TieredCache, make_cache_backend, make_cache_key
+from src.requirements import SECTION_FIELDS
+
+
+# Report sections and the search terms used to refresh each one on its own
+SECTIONS = {
+    "visa": "visa requirements",
+    "passport": "passport requirements",
+    "advisory": "travel advisories",
+    "documents": "additional documents",
+}
+
+
+def canonicalize_corridor(
+    user_query: str,
+    nationality: Optional[str] = None,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+) -> str:
+    """
+    Build the cache key of a travel corridor.
+
+    Uses the nationality/origin/destination triple when the destination is known and falls
+    back to the normalized user query otherwise. Countries are keyed by the country a name,
+    alias or demonym refers to, so "UK" and "United Kingdom" or "Kenyan" and "Kenya" match.
+
+    Args:
+        user_query: The refined query produced by the agent node
+        nationality: Nationality of the traveller, if known
+        origin: Country the traveller departs from, if known
+        destination: Country the traveller goes to, if known
+
+    Returns:
+        str: The corridor key
+    """
+
+    # Imported here as the router imports `SECTIONS` from this module
+    from src.router import canonical_country
+
+    def canonical(value: Optional[str]) -> str:
+        return " ".join(re.sub(r"[^\w\s]", " ", (value or "").lower()).split())
+
+    def country(value: Optional[str]) -> str:
+        return canonical(canonical_country(value) or value)
+
+    if destination:
+        return make_cache_key(
+            "corridor", country(nationality), country(origin), country(destination)
+        )
+    return make_cache_key("corridor", canonical(user_query))
+
+
+class CorridorCache:
+    """
+    Cache of researched answers per travel corridor.
+
+    Each entry records when every report section was last researched, so sections can
+    go stale on their own schedule (travel advisories change faster than passport rules).
+    Notes and search results are kept in batches, one per run that researched the
+    corridor, each tagged with the sections it is still the latest research for.
+
+    Args:
+        backend: The cache storing entries, or None to disable caching
+        freshness: Seconds each section in `SECTIONS` stays fresh
+    """
+
+    def __init__(
+        self,
+        backend: Optional[InMemoryCache | TieredCache],
+        freshness: dict[str, float],
+    ):
+        self.backend = backend
+        self.freshness = freshness
+
+    def get(self, key: str) -> tuple[Optional[dict[str, Any]], list[str]]:
+        """
+        Look up a corridor.
+
+        Returns:
+            tuple: The cached entry (or None), with the notes and search results of the
+                batches still fresh for some section, and the list of sections that are stale
+        """
+        entry = self.backend.get(key) if self.backend is not None else None
+        if entry is None:
+            return None, list(SECTIONS)
+
+        now = time.time()
+        stale_sections = [
+            section
+            for section in SECTIONS
+            if now - entry["researched_at"].get(section, 0) > self.freshness[section]
+        ]
+
+        # Research that is stale for all its sections is left out, so it is not extracted
+        # again next to the refreshed research; stale fields of the info are cleared too
+        stale = set(stale_sections)
+        batches = [
+            batch for batch in entry_batches(entry) if not stale.issuperset(batch["sections"])
+        ]
+        info = entry["info"]
+        if isinstance(info, dict) and stale:
+            info = {
+                **info,
+                **{name: None for section in stale for name in SECTION_FIELDS[section]},
+            }
+        entry = {
+            **entry,
+            "info": info,
+            "completed_notes": [note for batch in batches for note in batch["notes"]],
+            "search_results": [
+                source for batch in batches for source in batch["search_results"]
+            ],
+        }
+        return entry, stale_sections
+
+    def set(
+        self,
+        key: str,
+        info: dict[str, Any],
+        completed_notes: list[str],
+        search_results: Optional[list[dict]],
+        refreshed_sections: list[str],
+    ) -> None:
+        """
+        Store a corridor answer, marking `refreshed_sections` as researched now.
+
+        The notes not in the cached entry (those that are were loaded from it) and the
+        search results become a new batch for the refreshed sections. Earlier batches stop
+        counting for those sections and are dropped once no section is left to them, so an
+        entry holds at most one batch per section.
+
+        Args:
+            key: The corridor key
+            info: The extracted information
+            completed_notes: Notes of the run, including those loaded from the entry
+            search_results: Sources researched by the run
+            refreshed_sections: Report sections the run researched
+        """
+        if self.backend is None:
+            return
+
+        previous = self.backend.get(key)
+        researched_at = dict(previous["researched_at"]) if previous else {}
+        now = time.time()
+        for section in refreshed_sections:
+            researched_at[section] = now
+
+        batches = entry_batches(previous) if previous else []
+        cached_notes = {note for batch in batches for note in batch["notes"]}
+        refreshed = set(refreshed_sections)
+        kept = []
+        for batch in batches:
+            sections = [section for section in batch["sections"] if section not in refreshed]
+            if sections:
+                kept.append({**batch, "sections": sections})
+        kept.append(
+            {
+                "sections": list(refreshed_sections),
+                "notes": [note for note in completed_notes if note not in cached_notes],
+                "search_results": search_results or [],
+            }
+        )
+
+        self.backend.set(
+            key,
+            {"info": info, "batches": kept, "researched_at": researched_at},
+        )
+
+
+def entry_batches(entry: dict[str, Any]) -> list[dict[str, Any]]:
+    """Note and search result batches of a cache entry, reading entries written without them"""
+    if "batches" in entry:
+        return entry["batches"]
+    return [
+        {
+            "sections": list(SECTIONS),
+            "notes": entry.get("completed_notes") or [],
+            "search_results": entry.get("search_results") or [],
+        }
+    ]
+
+
+_corridor_caches: dict[tuple, CorridorCache] = {}
+
+
+def get_corridor_cache(
+    backend: str, path: str, max_entries: int, freshness: dict[str, float]
+) -> CorridorCache:
+    """Return the process-wide corridor cache for the given settings (see `make_cache_backend`)"""
+    settings = (backend, path, int(max_entries), tuple(sorted(freshness.items())))
+    if settings not in _corridor_caches:
+        _corridor_caches[settings] = CorridorCache(
+            make_cache_backend(
+                backend, path, max(freshness.values()), max_entries, "corridor_answers"
+            ),
+            freshness,
+        )
+    return _corridor_caches[settings]
@@ -0,0 +1,119 @@
+import hashlib
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "_ga", "_gl", "spm", "cmpid",
+}
+
+SIMHASH_BITS = 64
+
+# Texts shorter than this many words are only deduplicated on an exact content match
+MIN_SIMHASH_WORDS = 8
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a URL, so variants of one page compare equal.
+
+    Drops the scheme difference between http and https, a leading "www.", default ports,
+    trailing slashes, fragments and tracking query parameters, and sorts the remaining
+    query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = "https" if parts.scheme in ("http", "https", "") else parts.scheme.lower()
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+        )
+    )
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def content_hash(text: str) -> str:
+    """Hash of a text with case and whitespace normalized"""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def simhash(words: list[str], shingle_size: int = 3) -> int:
+    """
+    64-bit SimHash over the word shingles of a text.
+
+    Texts that share most of their shingles get fingerprints a few bits apart. Word hashes
+    come from Python's string hash, so fingerprints are only comparable within one process.
+    """
+    import numpy as np
+
+    word_hashes = np.fromiter(
+        (hash(word) & 0xFFFFFFFFFFFFFFFF for word in words), dtype=np.uint64, count=len(words)
+    )
+    count = max(1, len(words) - shingle_size + 1)
+
+    # Combine consecutive word hashes into shingle hashes, then mix them (splitmix64 finalizer)
+    shingles = word_hashes[:count].copy()
+    for offset in range(1, min(shingle_size, len(words))):
+        shingles = shingles * np.uint64(0x100000001B3) + word_hashes[offset : offset + count]
+    shingles = np.unique(shingles)
+    shingles ^= shingles >> np.uint64(30)
+    shingles *= np.uint64(0xBF58476D1CE4E5B9)
+    shingles ^= shingles >> np.uint64(27)
+    shingles *= np.uint64(0x94D049BB133111EB)
+    shingles ^= shingles >> np.uint64(31)
+
+    # Count, for every bit position, how many shingle hashes have that bit set
+    bits = (shingles[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int(sum(1 << int(bit) for bit in np.flatnonzero(majority)))
+
+
+class NearDuplicateIndex:
+    """
+    Finds SimHash fingerprints within a Hamming distance of ones already added.
+
+    Fingerprints are split into `max_distance + 1` bands; by the pigeonhole principle two
+    fingerprints within `max_distance` bits agree on at least one band, so only fingerprints
+    sharing a band are compared.
+
+    Args:
+        max_distance: Max number of differing bits for two texts to count as near-duplicates
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+        self._buckets: dict[tuple[int, int], list[int]] = {}
+
+    def _band_keys(self, fingerprint: int) -> list[tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        return [
+            (band, (fingerprint >> (band * self.band_bits)) & mask) for band in range(self.bands)
+        ]
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """Return an added fingerprint within max_distance bits, or None"""
+        for key in self._band_keys(fingerprint):
+            for candidate in self._buckets.get(key, ()):
+                if (candidate ^ fingerprint).bit_count() <= self.max_distance:
+                    return candidate
+        return None
+
+    def add(self, fingerprint: int) -> None:
+        for key in self._band_keys(fingerprint):
+            self._buckets.setdefault(key, []).append(fingerprint)
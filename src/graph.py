@@ -1,47 +1,232 @@
 import asyncio
 import json
+import logging
+import time
+from langgraph.constants import CONFIG_KEY_CHECKPOINTER
 from langgraph.graph import StateGraph, END
-from src.state import AgentState, InputState, OutputState
-from langgraph.types import Command
-from typing import Literal
+from langgraph.store.base import BaseStore
+from src.state import AgentState, InputState, OutputState, ResearchQueryState
+from langgraph.types import Command, Send
+from langgraph.config import get_stream_writer
+from typing import Literal, Optional, Type
 from src.utils import (
     get_current_date,
     deduplicate_sources,
-    format_sources,
-    format_all_notes,
 )
+from src.prompt_builder import format_sources, format_all_notes
 from src.prompts import (
     QUERY_WRITER_PROMPT,
+    QUERY_WRITER_INPUT,
     SUMMARIZE_INSTRUCTIONS,
+    SUMMARIZE_INPUT,
     EXTRACTION_PROMPT,
+    EXTRACTION_INPUT,
+    INCREMENTAL_EXTRACTION_PROMPT,
+    INCREMENTAL_EXTRACTION_INPUT,
     REFLECTION_INSTRUCTIONS,
+    REFLECTION_INPUT,
     AGENT_PROMPT,
-    FORMAT_RESPONSE_PROMPT
+    AGENT_INPUT,
+    AGENT_QUERY_PLANNING_PROMPT,
+    AGENT_QUERY_PLANNING_INPUT,
+    HISTORY_SUMMARY_PROMPT,
+    HISTORY_SUMMARY_INPUT,
+    FORMAT_RESPONSE_PROMPT,
+    FORMAT_RESPONSE_INPUT,
+)
+from src.schema import (
+    SearchQueries,
+    ReflectionOutput,
+    RouteAndPlanQuery,
+    RouteUserQuery,
+    TravelRequirements,
+)
+from langchain_core.messages import (
+    SystemMessage,
+    HumanMessage,
+    AIMessage,
+    message_chunk_to_message,
 )
-from src.schema import SearchQueries, ReflectionOutput, RouteUserQuery
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from langchain_core.runnables import RunnableConfig
 from src.configuration import Configuration
+from src.cache import get_search_cache, normalize_query
+from src.dedup import canonicalize_url
+from src.llm_cache import get_llm_cache
+from src.corridor import SECTIONS, canonicalize_corridor, get_corridor_cache
+from src.telemetry import instrument_node, record, run_token_usage, set_attribute, timed
+from src.history import render_history, window_start
+from src.router import CHIT_CHAT_REPLIES, classify_message, find_sections
+from src.knowledge import corridor_of, get_knowledge_base
+from src.checkpoint import get_checkpointer
+from src.completeness import score_completeness
+from src.requirements import render_requirements
+from src.sources import get_source_store
+from src.clients import (
+    get_llm,
+    get_model_name,
+    get_search_client,
+    get_structured_llm,
+    set_llm,
+    set_search_client,
+)
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+async def invoke_structured(
+    schema: Type[BaseModel],
+    messages: list,
+    configuration: Configuration,
+    store: Optional[BaseStore] = None,
+) -> BaseModel:
+    """Invoke the model with a structured output schema, going through the LLM response cache"""
+    structured_llm = get_structured_llm(schema, configuration)
+    llm_cache = get_llm_cache(
+        configuration.llm_cache_backend,
+        configuration.llm_cache_max_entries,
+        configuration.llm_cache_ttl,
+        configuration.llm_cache_similarity_threshold
+        if configuration.llm_cache_semantic
+        else None,
+    )
+    if llm_cache is None:
+        return await structured_llm.ainvoke(messages)
+
+    return await llm_cache.ainvoke(
+        structured_llm,
+        messages,
+        model_name=get_model_name(),
+        schema=schema,
+        store=store,
+    )
 
-from tavily import AsyncTavilyClient
 
+def section_freshness(configuration: Configuration) -> dict[str, float]:
+    """Seconds researched information on each report section stays fresh"""
+    return {
+        "visa": configuration.visa_freshness_hours * 3600,
+        "passport": configuration.passport_freshness_hours * 3600,
+        "advisory": configuration.advisory_freshness_hours * 3600,
+        "documents": configuration.documents_freshness_hours * 3600,
+    }
 
-from langchain_openai import AzureChatOpenAI
 
-# Initialize llm
-llm = AzureChatOpenAI(
-    azure_deployment="gpt-4.1-mini",
-    api_version="2024-12-01-preview",
-    temperature=0,
-)
+def get_configured_corridor_cache(configuration: Configuration):
+    """Return the corridor cache built from the configuration"""
+    return get_corridor_cache(
+        configuration.corridor_cache_backend,
+        configuration.corridor_cache_path,
+        configuration.corridor_cache_max_entries,
+        section_freshness(configuration),
+    )
+
+
+def get_configured_source_store(configuration: Configuration):
+    """Return the source store built from the configuration, or None when it is off"""
+    return get_source_store(
+        configuration.source_store_backend,
+        configuration.source_store_path,
+        configuration.source_store_ttl,
+        configuration.source_store_max_entries,
+    )
+
+
+async def summarize_history(
+    summary: Optional[str], messages: list, configuration: Configuration
+) -> str:
+    """Fold messages that left the history window into the rolling conversation summary"""
+    response = await get_llm(configuration).ainvoke(
+        [
+            SystemMessage(
+                content=HISTORY_SUMMARY_PROMPT.format(
+                    user_name=configuration.user_name,
+                    assistant_role=configuration.assistant_role,
+                )
+            ),
+            HumanMessage(
+                content=HISTORY_SUMMARY_INPUT.format(
+                    conversation_summary=summary or "",
+                    conversation_history=render_history(messages),
+                )
+            ),
+        ]
+    )
+    return str(response.content)
+
+
+async def write_queries(
+    user_query: str, configurable: Configuration, store: Optional[BaseStore] = None
+) -> list[str]:
+    """Write the search queries researching a user query"""
+    system_instruction = QUERY_WRITER_PROMPT.format(
+        max_search_queries=configurable.max_search_queries,
+        assistant_role=configurable.assistant_role,
+    )
+
+    # Invoke the model to produce structured output that matches the schema
+    response = await invoke_structured(
+        SearchQueries,
+        [
+            SystemMessage(content=system_instruction),
+            HumanMessage(
+                content=QUERY_WRITER_INPUT.format(
+                    current_date=get_current_date(), user_query=user_query
+                )
+            ),
+        ],
+        configurable,
+        store,
+    )
+    return [query for query in response.queries]
+
 
-tavily_async_client = AsyncTavilyClient()
+async def settle_speculation(
+    speculation: Optional[asyncio.Task], keep: bool
+) -> Optional[list[str]]:
+    """
+    Take the speculative queries when the agent's decision agrees with the speculation,
+    otherwise cancel it. Discarded speculations are recorded as wasted here; kept ones are
+    recorded by `check_corridor_cache`, once it knows whether the corridor needs research.
+    """
+    if speculation is None:
+        return None
+    if keep:
+        try:
+            return await speculation
+        except Exception:
+            logger.warning("Speculative query writing failed", exc_info=True)
+    elif not speculation.done():
+        speculation.cancel()
+    record("speculation_wasted", 1)
+    return None
+
+
+# Research state of the previous turn, cleared when a turn starts researching its query so
+# a new corridor is not merged into the last one (None starts the list fields over)
+TURN_RESET = {
+    "info": None,
+    "is_satisfactory": None,
+    "reflection_steps_taken": 0,
+    "extracted_notes_count": 0,
+    "completed_notes": None,
+    "issued_queries": None,
+    "seen_urls": None,
+    "search_results": None,
+}
 
 
 async def agent(
-    state: AgentState, config: RunnableConfig
-) -> Command[Literal["generate_queries", END]]:
-    """Langgraph node to understand user intent"""
+    state: AgentState, config: RunnableConfig, store: Optional[BaseStore] = None
+) -> Command[Literal["check_corridor_cache", END]]:
+    """Langgraph node to understand user intent
+
+    When `speculative_queries` is on and the message looks like a corridor query, the
+    search queries are written alongside the intent check and kept if the agent agrees
+    on the corridor.
+    """
+
+    started_at = time.time()
 
     # get messages from state
     messages = state.messages
@@ -52,183 +237,561 @@ async def agent(
     assistant_name = configuration.assistant_name
     assistant_role = configuration.assistant_role
 
+    # Clear corridor queries and chit-chat are routed without the LLM intent check
+    decision = None
+    if messages and messages[-1].type == "human":
+        decision = classify_message(str(messages[-1].content))
+        if decision.confidence >= configuration.router_confidence_threshold:
+            set_attribute("route", f"heuristic_{decision.kind}")
+            if decision.kind == "corridor":
+                return Command(
+                    update={
+                        "user_query": str(messages[-1].content),
+                        "nationality": decision.nationality,
+                        "origin": decision.origin,
+                        "destination": decision.destination,
+                        "started_at": started_at,
+                        **TURN_RESET,
+                        "planned_queries": None,
+                        "messages": AIMessage(content="Processing your request."),
+                    },
+                    goto="check_corridor_cache",
+                )
+            reply = CHIT_CHAT_REPLIES[decision.chit_chat].format(
+                user_name=user_name, assistant_name=assistant_name
+            )
+            return Command(update={"messages": AIMessage(content=reply)}, goto=END)
+
+    # Turns older than the window are folded into the summary; turns that just left the
+    # window are still shown verbatim this time, while the summary catches up alongside.
+    # Without a checkpointer the summary would not reach the next turn (clients resend the
+    # whole conversation), so older turns are left out instead of summarized.
+    window = window_start(messages, configuration.history_window_turns)
+    if config.get("configurable", {}).get(CONFIG_KEY_CHECKPOINTER) is not None:
+        summarized = state.summarized_messages_count
+        window = max(window, summarized)
+    else:
+        summarized = window
+
+    combined = configuration.query_generation_mode == "combined"
+    if configuration.query_generation_mode not in ("separate", "combined"):
+        raise ValueError(f"Unknown query generation mode: {configuration.query_generation_mode}")
+
+    # Likely corridor queries get their search queries written while the agent decides
+    # (unless the agent writes them itself)
+    speculation = None
+    if (
+        configuration.speculative_queries
+        and not combined
+        and decision is not None
+        and decision.kind == "corridor"
+        and decision.confidence >= configuration.speculation_min_confidence
+    ):
+        speculation = asyncio.create_task(
+            write_queries(str(messages[-1].content), configuration, store)
+        )
+        record("speculation_started", 1)
+
     system_instruction = AGENT_PROMPT.format(
-        conversation_history=messages,
         user_name=user_name,
         assistant_role=assistant_role,
         assistant_name=assistant_name,
     )
+    agent_input = AGENT_INPUT.format(
+        user_name=user_name,
+        conversation_summary=state.conversation_summary or "",
+        conversation_history=render_history(messages[summarized:]),
+    )
+    # In combined mode the same call also writes the search queries
+    if combined:
+        system_instruction += AGENT_QUERY_PLANNING_PROMPT.format(
+            max_search_queries=configuration.max_search_queries,
+            assistant_role=assistant_role,
+        )
+        agent_input += AGENT_QUERY_PLANNING_INPUT.format(current_date=get_current_date())
 
-    structured_llm = llm.with_structured_output(RouteUserQuery)
-
-    response = await structured_llm.ainvoke(
-        [
-            SystemMessage(content=system_instruction),
-            HumanMessage(content=f"Please help analyse the user intent"),
-        ]
+    route = invoke_structured(
+        RouteAndPlanQuery if combined else RouteUserQuery,
+        [SystemMessage(content=system_instruction), HumanMessage(content=agent_input)],
+        configuration,
+        store,
     )
+    try:
+        if window > summarized:
+            response, conversation_summary = await asyncio.gather(
+                route,
+                summarize_history(
+                    state.conversation_summary, messages[summarized:window], configuration
+                ),
+            )
+        else:
+            response, conversation_summary = await route, state.conversation_summary
+    except BaseException:
+        await settle_speculation(speculation, keep=False)
+        raise
+
+    # Speculative queries were written for the heuristic corridor, so they only stand
+    # when the agent researches that same corridor
+    planned_queries = None
+    if combined:
+        planned_queries = response.search_queries or None
+    elif speculation is not None:
+        planned_queries = await settle_speculation(
+            speculation,
+            keep=response.is_satisfactory
+            and corridor_of(response.nationality, response.origin, response.destination)
+            == corridor_of(decision.nationality, decision.origin, decision.destination),
+        )
+
+    history_update = {
+        "conversation_summary": conversation_summary,
+        "summarized_messages_count": window,
+    }
 
     if response.is_satisfactory:
         return Command(
             update={
                 "user_query": response.search_query,
+                "nationality": response.nationality,
+                "origin": response.origin,
+                "destination": response.destination,
+                "started_at": started_at,
+                **TURN_RESET,
+                "planned_queries": planned_queries,
                 "messages": AIMessage(content=response.response_to_user),
+                **history_update,
             },
-            goto="generate_queries",
+            goto="check_corridor_cache",
         )
     else:
         return Command(
             update={
                 "messages": AIMessage(content=response.response_to_user),
+                **history_update,
             },
             goto=END,
         )
 
 
-async def generate_queries(
+async def check_corridor_cache(
     state: AgentState, config: RunnableConfig
-) -> Command[Literal["web_research"]]:
+) -> Command[Literal["generate_queries", "web_research", "research_query", "format_response"]]:
     """
-    Langgraph node that generates a search queries based on the user query
+    Langgraph node that serves repeat travel corridors from the corridor cache
 
-    Uses a structured LLM to generate  optimized search queries for web research based on the user query.
+    A fresh cached answer goes straight to the response. When only some report sections
+    are stale, only those sections are researched again on top of the cached notes.
+    Unknown corridors go to `generate_queries`, or straight to research with the queries
+    the agent turn already wrote.
 
     Args:
-        state: Current graph state containing the user query
+        state: Current graph state containing the user query and corridor
         config: Configuration for the runnable
 
     Returns:
         Command: To help update the graph state AND route to the next node
-
     """
 
-    # get user query
-    user_query = state.user_query
-
     # Get configuration
     configurable = Configuration.from_runnable_config(config)
-    max_search_queries = configurable.max_search_queries
-    assistant_role = configurable.assistant_role
-
-    # get the current date
-    current_date = get_current_date()
+    corridor_cache = get_configured_corridor_cache(configurable)
 
-    # Format the system instructions
-    system_instruction = QUERY_WRITER_PROMPT.format(
-        user_query=user_query,
-        max_search_queries=max_search_queries,
-        assistant_role=assistant_role,
-        current_date=current_date,
+    corridor_key = canonicalize_corridor(
+        state.user_query, state.nationality, state.origin, state.destination
     )
+    entry, stale_sections = corridor_cache.get(corridor_key)
+
+    # Research everything when the corridor is unknown or too many sections went stale,
+    # straight away when the agent turn already wrote the search queries
+    if entry is None or len(stale_sections) > configurable.max_search_queries:
+        update = {"corridor_key": corridor_key, "refreshed_sections": list(SECTIONS)}
+        if not state.planned_queries:
+            return Command(update=update, goto="generate_queries")
+        if configurable.query_generation_mode == "separate":
+            record("speculation_used", 1)
+        update["search_queries"] = state.planned_queries
+        return Command(
+            update=update, goto=route_research(state, state.planned_queries, configurable)
+        )
 
-    # Bind the schema to rhe model
-    structured_llm = llm.with_structured_output(SearchQueries)
+    # The cached corridor makes the queries written ahead of time unnecessary
+    if state.planned_queries and configurable.query_generation_mode == "separate":
+        record("speculation_wasted", 1)
+
+    update = {
+        "corridor_key": corridor_key,
+        "info": entry["info"],
+        "completed_notes": entry["completed_notes"],
+        "extracted_notes_count": len(state.completed_notes) + len(entry["completed_notes"]),
+        "refreshed_sections": stale_sections,
+    }
+    if configurable.include_search_results:
+        update["search_results"] = entry["search_results"] or []
 
-    # Invoke the model to produce structured output that matches the schema
-    response = await structured_llm.ainvoke(
-        [
-            SystemMessage(content=system_instruction),
-            HumanMessage(
-                content="Please generate a list of search queries to help gather relevant information"
-            ),
-        ]
+    if not stale_sections:
+        return Command(update=update, goto="format_response")
+
+    # Only research the sections that went stale
+    update["search_queries"] = [
+        f"{state.user_query} {SECTIONS[section]}" for section in stale_sections
+    ]
+    return Command(
+        update=update,
+        goto=route_research(state, update["search_queries"], configurable),
     )
 
+
+async def generate_queries(
+    state: AgentState, config: RunnableConfig, store: Optional[BaseStore] = None
+) -> Command[Literal["web_research", "research_query"]]:
+    """
+    Langgraph node that generates a search queries based on the user query
+
+    Uses a structured LLM to generate  optimized search queries for web research based on the user query.
+
+    Args:
+        state: Current graph state containing the user query
+        config: Configuration for the runnable
+
+    Returns:
+        Command: To help update the graph state AND route to the next node
+
+    """
+
+    # Get configuration
+    configurable = Configuration.from_runnable_config(config)
+
     # Queries
-    query_list = [query for query in response.queries]
+    query_list = await write_queries(state.user_query, configurable, store)
 
     # Perform state update and go the web search mode
     return Command(
         # state update
         update={"search_queries": query_list},
         # Control flow
-        goto="web_research",
+        goto=route_research(state, query_list, configurable),
     )
 
 
-async def web_research(
-    state: AgentState, config: RunnableConfig
-) -> Command[Literal["extract_info"]]:
-    """Langgraph node to  multi step web research using the generated search queries
+async def research(
+    user_query: str,
+    queries: list[str],
+    configurable: Configuration,
+    seen_urls: Optional[list[str]] = None,
+    corridor: Optional[tuple[str, str]] = None,
+    follow_up: bool = False,
+) -> tuple[Optional[str], list[dict]]:
+    """
+    Search the queries concurrently and take notes on the deduplicated sources.
 
-    Functions
-    1. Execute concurrent web searches using tavily API
-    2. Deduplicates and format
+    Queries about report sections the knowledge base holds fresh sources for are answered
+    from it, then queries the vector index of earlier fetched sources covers well enough;
+    the rest are searched on the web, and their results added to both.
 
     Args:
-        state: Current graph state containing the search query
+        user_query: The user query the notes are about
+        queries: Search queries to run
+        configurable: Configuration of the run
+        seen_urls: URLs researched earlier, left out of the notes
+        corridor: Traveller's country and destination (see `corridor_of`), if known
+        follow_up: Whether the queries are reflection's gap queries
 
     Returns:
-        Command: To help update the graph state AND route to the next node
+        tuple: The research notes (None when there were no new sources) and the deduplicated sources
     """
 
-    # User query
-    user_query = state.user_query
+    # Repeat queries are served from the search cache
+    search_cache = get_search_cache(
+        configurable.search_cache_backend,
+        configurable.search_cache_path,
+        configurable.search_cache_ttl,
+        configurable.search_cache_max_entries,
+    )
 
-    # Get configuration
-    configurable = Configuration.from_runnable_config(config)
-    max_search_results = configurable.max_search_results
-    assistant_role = configurable.assistant_role
+    freshness = section_freshness(configurable)
+    knowledge_base = None
+    if corridor is not None:
+        knowledge_base = get_knowledge_base(
+            configurable.knowledge_base_backend,
+            configurable.knowledge_base_path,
+            max(freshness.values()),
+        )
+
+    # Answer queries from the knowledge base where every section they ask about is known,
+    # except follow-up queries: they ask for what the known sources lacked
+    search_docs = []
+    web_queries = []
+    for query in queries:
+        sections = find_sections(query) if knowledge_base is not None else []
+        known = [
+            knowledge_base.lookup(
+                corridor, section, freshness[section], configurable.max_search_results
+            )
+            for section in sections
+            if not follow_up
+        ]
+        if known and all(known):
+            search_docs.append({"results": [source for sources in known for source in sources]})
+        else:
+            web_queries.append((query, sections))
+    record("knowledge_hits", len(queries) - len(web_queries))
+
+    # Then from the chunks of sources fetched before (the vector store and its embedding
+    # clients are only imported when a backend is configured)
+    retriever = None
+    if configurable.vector_store_backend != "none":
+        from src.vector_store import get_retriever
+
+        retriever = get_retriever(
+            configurable.vector_store_backend,
+            configurable.vector_store_path,
+            configurable.embedding_provider,
+            configurable.embedding_deployment,
+            configurable.embedding_dimensions,
+            configurable.retrieval_max_age_hours * 3600,
+        )
+    if retriever is not None and web_queries:
+        with timed("retrieval_seconds"):
+            retrieved = await retriever.retrieve(
+                [query for query, _ in web_queries],
+                configurable.retrieval_top_k,
+                configurable.retrieval_min_score,
+                configurable.retrieval_max_age_hours * 3600,
+                corridor,
+            )
+        search_docs.extend(response for response in retrieved if response is not None)
+        web_queries = [
+            query for query, response in zip(web_queries, retrieved) if response is None
+        ]
+        record("retrieval_hits", sum(response is not None for response in retrieved))
 
     # Search tasks
     search_tasks = []
-    for query in state.search_queries:
+    for query, _ in web_queries:
         search_tasks.append(
-            tavily_async_client.search(
+            search_cache.search(
+                get_search_client(configurable),
                 query,
-                max_results=max_search_results,
+                max_results=configurable.max_search_results,
                 include_raw_content=True,
                 topic="general",
             )
         )
 
     # Execute all searches concurrently
-    search_docs = await asyncio.gather(*search_tasks)
+    web_docs = await asyncio.gather(*search_tasks)
+    search_docs.extend(web_docs)
+
+    # Keep what the web returned for the sections each query was about
+    if knowledge_base is not None:
+        for (_, sections), response in zip(web_queries, web_docs):
+            for section in sections:
+                knowledge_base.add(corridor, section, response.get("results", []))
+
+    # Index the fetched sources while the notes are taken
+    indexing = None
+    if retriever is not None and web_docs:
+        indexing = asyncio.create_task(
+            retriever.add_sources(
+                [source for response in web_docs for source in response.get("results", [])]
+            )
+        )
 
     # Deduplicate and format sources
-    deduplicated_search_docs = deduplicate_sources(search_docs)
-    source_str = format_sources(
-        deduplicated_search_docs, max_tokens_per_source=1000, include_raw_content=True
-    )
+    with timed("format_seconds"):
+        deduplicated_search_docs = deduplicate_sources(
+            search_docs, configurable.near_duplicate_distance
+        )
+        if seen_urls:
+            seen = {canonicalize_url(url) for url in seen_urls}
+            deduplicated_search_docs = [
+                source
+                for source in deduplicated_search_docs
+                if canonicalize_url(source["url"]) not in seen
+            ]
+        if not deduplicated_search_docs:
+            if indexing is not None:
+                await indexing
+            return None, []
+
+        source_str = format_sources(
+            deduplicated_search_docs,
+            include_raw_content=True,
+            query=" ".join([user_query, *queries]),
+            token_budget=configurable.source_token_budget,
+        )
 
     # Generate structured notes relevant to the extraction schema
     system_instruction = SUMMARIZE_INSTRUCTIONS.format(
-        user_query=user_query,
-        assistant_role=assistant_role,
-        content=source_str,
+        assistant_role=configurable.assistant_role,
     )
 
-    response = await llm.ainvoke(
+    response = await get_llm(configurable).ainvoke(
         [
             SystemMessage(content=system_instruction),
             HumanMessage(
-                content=f"Take clear, organized notes about the user query, focusing on topics relevant to our interests "
+                content=SUMMARIZE_INPUT.format(user_query=user_query, content=source_str)
             ),
         ]
     )
 
+    if indexing is not None:
+        await indexing
+
+    return str(response.content), deduplicated_search_docs
+
+
+def new_queries(search_queries: list[str], state: AgentState, configurable: Configuration) -> list[str]:
+    """Drop the queries already run in earlier research steps when in incremental mode"""
+    if not configurable.incremental_research:
+        return search_queries
+    issued = {normalize_query(query) for query in state.issued_queries}
+    queries = []
+    for query in search_queries:
+        if normalize_query(query) not in issued:
+            issued.add(normalize_query(query))
+            queries.append(query)
+    return queries
+
+
+def route_research(
+    state: AgentState,
+    search_queries: list[str],
+    configurable: Configuration,
+    follow_up: bool = False,
+) -> str | list[Send]:
+    """
+    Route search queries to research.
+
+    In parallel mode every query gets its own `research_query` branch, otherwise
+    `web_research` handles all of them in one step. follow_up marks reflection's gap
+    queries, which are never answered from the knowledge base.
+    """
+    search_queries = new_queries(search_queries, state, configurable)
+    if configurable.parallel_research and search_queries:
+        seen_urls = state.seen_urls if configurable.incremental_research else []
+        return [
+            Send(
+                "research_query",
+                ResearchQueryState(
+                    user_query=state.user_query,
+                    query=query,
+                    seen_urls=seen_urls,
+                    corridor=corridor_of(state.nationality, state.origin, state.destination),
+                    started_at=state.started_at,
+                    follow_up=follow_up,
+                ),
+            )
+            for query in search_queries
+        ]
+    return "web_research"
+
+
+def research_update(
+    queries: list[str],
+    notes: Optional[str],
+    search_docs: list[dict],
+    configurable: Configuration,
+) -> dict:
+    """
+    State update recording the outcome of a research step.
+
+    With a source store, search results are recorded as compact references and their
+    page content is kept in the store.
+    """
+    update = {
+        "issued_queries": queries,
+        "seen_urls": [source["url"] for source in search_docs],
+    }
+    if notes is not None:
+        update["completed_notes"] = [notes]
     if configurable.include_search_results:
-        return Command(
-            update={
-                "completed_notes": [str(response.content)],
-                "search_results": deduplicated_search_docs,
-            },
-            goto="extract_info",
-        )
-    else:
-        return Command(
-            update={"completed_notes": [str(response.content)]},
-            goto="extract_info",
-        )
+        source_store = get_configured_source_store(configurable)
+        if source_store is not None:
+            search_docs = [source_store.to_ref(source) for source in search_docs]
+        update["search_results"] = search_docs
+    return update
 
 
-async def extract_info(
+async def web_research(
     state: AgentState, config: RunnableConfig
+) -> Command[Literal["extract_info"]]:
+    """Langgraph node to  multi step web research using the generated search queries
+
+    Functions
+    1. Execute concurrent web searches using tavily API
+    2. Deduplicates and format
+
+    Args:
+        state: Current graph state containing the search query
+
+    Returns:
+        Command: To help update the graph state AND route to the next node
+    """
+
+    # Get configuration
+    configurable = Configuration.from_runnable_config(config)
+
+    queries = new_queries(state.search_queries, state, configurable)
+    seen_urls = state.seen_urls if configurable.incremental_research else None
+
+    notes, deduplicated_search_docs = await research(
+        state.user_query,
+        queries,
+        configurable,
+        seen_urls,
+        corridor_of(state.nationality, state.origin, state.destination),
+        # Reflection counts the loops it starts, so later steps research its gap queries
+        follow_up=state.reflection_steps_taken > 0,
+    )
+
+    return Command(
+        update=research_update(queries, notes, deduplicated_search_docs, configurable),
+        goto="extract_info",
+    )
+
+
+async def research_query(
+    state: ResearchQueryState, config: RunnableConfig
+) -> Command[Literal["extract_info"]]:
+    """Langgraph node researching a single search query, run as one branch of a parallel fan-out
+
+    Each branch searches and summarizes its own query; the notes of all branches are merged
+    through the `completed_notes` reducer before `extract_info` runs.
+
+    Args:
+        state: The user query and the search query of this branch
+
+    Returns:
+        Command: To help update the graph state AND route to the next node
+    """
+
+    # Get configuration
+    configurable = Configuration.from_runnable_config(config)
+
+    notes, deduplicated_search_docs = await research(
+        state.user_query,
+        [state.query],
+        configurable,
+        state.seen_urls,
+        state.corridor,
+        state.follow_up,
+    )
+
+    return Command(
+        update=research_update([state.query], notes, deduplicated_search_docs, configurable),
+        goto="extract_info",
+    )
+
+
+async def extract_info(
+    state: AgentState, config: RunnableConfig, store: Optional[BaseStore] = None
 ) -> Command[Literal["reflection"]]:
     """Langgraph node that extract required information in the schema fields.
 
     Uses an LLM to create or update a running summary based on the newest web research
-    results, integrating them with any existing summary
+    results, integrating them with any existing summary. The summary is structured
+    (`TravelRequirements`) and kept in the state as a dict.
 
     Args:
         state: Current graph containing research topic, running summary, and web research results
@@ -240,32 +803,61 @@ async def extract_info(
     configurable = Configuration.from_runnable_config(config)
     assistant_role = configurable.assistant_role
 
-    # Format all notes
-    web_research_notes = format_all_notes(state.completed_notes)
+    if configurable.incremental_research and state.info is not None:
+        # Merge only the notes added since the last extraction into the existing info
+        new_notes = state.completed_notes[state.extracted_notes_count :]
+        if not new_notes:
+            return Command(goto="reflection")
 
-    system_instruction = EXTRACTION_PROMPT.format(
-        assistant_role=assistant_role,
-        web_research_notes=web_research_notes,
-    )
+        with timed("format_seconds"):
+            web_research_notes = format_all_notes(
+                new_notes, configurable.notes_token_budget or None
+            )
+        system_instruction = INCREMENTAL_EXTRACTION_PROMPT.format(assistant_role=assistant_role)
+        human_instruction = INCREMENTAL_EXTRACTION_INPUT.format(
+            extracted_information=render_requirements(state.info),
+            web_research_notes=web_research_notes,
+        )
+    else:
+        # Format all notes
+        with timed("format_seconds"):
+            web_research_notes = format_all_notes(
+                state.completed_notes, configurable.notes_token_budget or None
+            )
+
+        system_instruction = EXTRACTION_PROMPT.format(assistant_role=assistant_role)
+        human_instruction = EXTRACTION_INPUT.format(web_research_notes=web_research_notes)
 
-    response = await llm.ainvoke(
+    response = await invoke_structured(
+        TravelRequirements,
         [
             SystemMessage(content=system_instruction),
-            HumanMessage(content=f"Produce a structured output from the nodes"),
-        ]
+            HumanMessage(content=human_instruction),
+        ],
+        configurable,
+        store,
     )
 
-    return Command(update={"info": response}, goto="reflection")
+    return Command(
+        update={
+            "info": response.model_dump(),
+            "extracted_notes_count": len(state.completed_notes),
+        },
+        goto="reflection",
+    )
 
 
 async def reflection(
-    state: AgentState, config: RunnableConfig
-) -> Command[Literal["format_response", "web_research"]]:
+    state: AgentState, config: RunnableConfig, store: Optional[BaseStore] = None
+) -> Command[Literal["format_response", "web_research", "research_query"]]:
     """Langgraph node that identifies knowledge gaps and generates follow-up queries.
 
     Analyzes the current summary to identify areas for further research and generates
     a new search query to address those gaps. uses structured output to extract the follow-up query in JSON format
 
+    The LLM call is skipped when the run's research budget is spent or when the extracted
+    information already covers the report sections the user asked about.
+
     Args:
         state: Current graph state containing the running research output and user query
 
@@ -282,24 +874,38 @@ async def reflection(
 
     # Get Configuration
     configuration = Configuration.from_runnable_config(config)
-    max_reflection_steps = configuration.max_reflection_steps
     assistant_role = configuration.assistant_role
+    record("reflection_step", state.reflection_steps_taken)
 
-    system_instruction = REFLECTION_INSTRUCTIONS.format(
-        user_query=user_query,
-        assistant_role=assistant_role,
-        extracted_information=extracted_information,
+    # With no research loop left to start, the LLM's verdict could not change the outcome
+    stop_reason = research_budget_spent(state, config, configuration)
+    if stop_reason is not None:
+        set_attribute("reflection_skipped", stop_reason)
+        return Command(goto="format_response")
+
+    completeness = score_completeness(
+        extracted_information, find_sections(user_query or "") or None
     )
+    record("completeness", completeness.score)
+    if completeness.score >= configuration.completeness_threshold:
+        set_attribute("reflection_skipped", "complete")
+        return Command(update={"is_satisfactory": True}, goto="format_response")
 
-    structured_llm = llm.with_structured_output(ReflectionOutput)
+    system_instruction = REFLECTION_INSTRUCTIONS.format(assistant_role=assistant_role)
 
-    response = await structured_llm.ainvoke(
+    response = await invoke_structured(
+        ReflectionOutput,
         [
             SystemMessage(content=system_instruction),
             HumanMessage(
-                content=f"Analyse the information and return a structured output"
+                content=REFLECTION_INPUT.format(
+                    user_query=user_query,
+                    extracted_information=render_requirements(extracted_information),
+                )
             ),
-        ]
+        ],
+        configuration,
+        store,
     )
 
     if response.is_satisfactory:
@@ -308,22 +914,61 @@ async def reflection(
             goto="format_response",
         )
     else:
-        # Check if we have hit max reflection count
-        if state.reflection_steps_taken <= max_reflection_steps:
-
-            return Command(
-                update={
-                    "is_satisfactory": response.is_satisfactory,
-                    "search_queries": response.search_queries,
-                    "reflection_steps_taken": state.reflection_steps_taken + 1,
-                },
-                goto="web_research",
-            )
+        return Command(
+            update={
+                "is_satisfactory": response.is_satisfactory,
+                "search_queries": response.search_queries,
+                "reflection_steps_taken": state.reflection_steps_taken + 1,
+            },
+            goto=route_research(state, response.search_queries, configuration, follow_up=True),
+        )
+
+
+def research_budget_spent(
+    state: AgentState, config: RunnableConfig, configuration: Configuration
+) -> Optional[str]:
+    """
+    Which of the run's research budgets is spent, if any: "steps" once reflection started
+    `max_reflection_steps` loops, "time" past `research_time_budget` seconds since the run
+    started, "tokens" past `research_token_budget` prompt and completion tokens.
+    """
+    if state.reflection_steps_taken >= configuration.max_reflection_steps:
+        return "steps"
+    if (
+        configuration.research_time_budget
+        and state.started_at is not None
+        and time.time() - state.started_at >= configuration.research_time_budget
+    ):
+        return "time"
+    if (
+        configuration.research_token_budget
+        and run_token_usage(state.started_at, config) >= configuration.research_token_budget
+    ):
+        return "tokens"
+    return None
+
+
+async def stream_report(messages: list, configuration: Configuration) -> tuple[AIMessage, float]:
+    """
+    Generate the report token by token, emitting each token on the custom stream mode.
+
+    Returns:
+        tuple: The complete report message and the time its first token arrived
+    """
+    writer = get_stream_writer()
+    response = None
+    first_token_at = None
+
+    async for chunk in get_llm(configuration).astream(messages):
+        if chunk.content:
+            if first_token_at is None:
+                first_token_at = time.time()
+            writer({"token": chunk.content})
+        response = chunk if response is None else response + chunk
+
+    return message_chunk_to_message(response), first_token_at or time.time()
 
-        else:
 
-            return Command(goto="format_response")
-        
 async def format_response(state: AgentState, config: RunnableConfig)->Command[Literal[END]]:
     """_summary_
 
@@ -345,34 +990,101 @@ async def format_response(state: AgentState, config: RunnableConfig)->Command[Li
     user_query = state.user_query
     
     system_instruction = FORMAT_RESPONSE_PROMPT.format(
-        user_query = user_query,
         assistant_role = assistant_role,
-        relevant_information = extracted_info,
         output_structure = output_structure,
     )
-    
-    response = await llm.ainvoke([SystemMessage(content=system_instruction)])
-    
+    messages = [
+        SystemMessage(content=system_instruction),
+        HumanMessage(
+            content=FORMAT_RESPONSE_INPUT.format(
+                user_query=user_query, relevant_information=render_requirements(extracted_info)
+            )
+        ),
+    ]
+
+    requested_at = time.time()
+    if configuration.stream_response:
+        response, first_token_at = await stream_report(messages, configuration)
+    else:
+        response = await get_llm(configuration).ainvoke(messages)
+        first_token_at = time.time()
+
+    # Measured from the start of the run, i.e. what the user waits for the first byte
+    time_to_first_token = first_token_at - (state.started_at or requested_at)
+    logger.info(
+        "Report first token after %.2fs (%.2fs after the report was requested)",
+        time_to_first_token,
+        first_token_at - requested_at,
+    )
+
+    # Remember the researched answer for the next query about this corridor
+    if state.corridor_key and state.refreshed_sections:
+        # Results loaded from the cache come back with it; keep only those researched now
+        researched = {canonicalize_url(url) for url in state.seen_urls}
+        get_configured_corridor_cache(configuration).set(
+            state.corridor_key,
+            info=extracted_info,
+            completed_notes=state.completed_notes,
+            search_results=[
+                source
+                for source in state.search_results or []
+                if canonicalize_url(source["url"]) in researched
+            ],
+            refreshed_sections=state.refreshed_sections,
+        )
     
     return Command(
-        update={"messages": [response]},
+        update={"messages": [response], "time_to_first_token": time_to_first_token},
         goto=END
     )
 
 
-graph_builder = StateGraph(
-    AgentState, input=InputState, output=OutputState, config_schema=Configuration
-)
+def build_app(llm=None, search_client=None, **compile_kwargs):
+    """
+    Build and compile the travel agent graph.
+
+    The chat model and search client are created lazily on first use and shared by every
+    compiled graph in the process. Unless a checkpointer is passed, the one configured by
+    the `CHECKPOINTER_BACKEND` environment variable is used (none by default).
+
+    Args:
+        llm: Chat model to use instead of the default Azure OpenAI deployment
+        search_client: Search client to use instead of Tavily
+        compile_kwargs: Extra arguments passed to `StateGraph.compile`
+
+    Returns:
+        CompiledStateGraph: The compiled graph
+    """
+    if llm is not None:
+        set_llm(llm)
+    if search_client is not None:
+        set_search_client(search_client)
 
-graph_builder.add_node("agent", agent)
-graph_builder.add_node("generate_queries", generate_queries)
-graph_builder.add_node("web_research", web_research)
-graph_builder.add_node("extract_info", extract_info)
-graph_builder.add_node("reflection", reflection)
-graph_builder.add_node("format_response", format_response)
+    graph_builder = StateGraph(
+        AgentState, input=InputState, output=OutputState, config_schema=Configuration
+    )
 
+    # Every node is exported as a span (see `telemetry_exporter`)
+    graph_builder.add_node("agent", instrument_node(agent, entry=True))
+    graph_builder.add_node("check_corridor_cache", instrument_node(check_corridor_cache))
+    graph_builder.add_node("generate_queries", instrument_node(generate_queries))
+    graph_builder.add_node("web_research", instrument_node(web_research))
+    graph_builder.add_node(
+        "research_query", instrument_node(research_query), input=ResearchQueryState
+    )
+    graph_builder.add_node("extract_info", instrument_node(extract_info))
+    graph_builder.add_node("reflection", instrument_node(reflection))
+    graph_builder.add_node("format_response", instrument_node(format_response))
+
+    graph_builder.set_entry_point("agent")
+
+    if "checkpointer" not in compile_kwargs:
+        configuration = Configuration.from_runnable_config()
+        compile_kwargs["checkpointer"] = get_checkpointer(
+            configuration.checkpointer_backend, configuration.checkpoint_path
+        )
 
-graph_builder.set_entry_point("agent")
+    return graph_builder.compile(**compile_kwargs)
 
 
-app = graph_builder.compile()
+app = build_app()
@@ -0,0 +1,32 @@
+from langchain_core.messages import BaseMessage
+
+# How each message type is labelled when a conversation is rendered into a prompt
+ROLE_LABELS = {"human": "User", "ai": "Assistant", "system": "System", "tool": "Tool"}
+
+
+def render_history(messages: list[BaseMessage]) -> str:
+    """Render messages as compact `Role: content` lines, without ids and metadata"""
+    return "\n".join(
+        f"{ROLE_LABELS.get(message.type, message.type)}: {message.content}" for message in messages
+    )
+
+
+def window_start(messages: list[BaseMessage], window_turns: int) -> int:
+    """
+    Index of the first message of the last `window_turns` turns.
+
+    A turn starts at a user message and runs until the next one.
+
+    Args:
+        messages: Conversation messages, oldest first
+        window_turns: Number of most recent turns to keep, 0 to keep every message
+
+    Returns:
+        int: Index of the first message to keep verbatim
+    """
+    if window_turns <= 0:
+        return 0
+    turn_starts = [index for index, message in enumerate(messages) if message.type == "human"]
+    if len(turn_starts) <= window_turns:
+        return 0
+    return turn_starts[-window_turns]
@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from src.configuration import Configuration
+from src.router import canonical_country, find_sections
+from src.sources import SourceStore, get_source_store
+
+
+def corridor_of(
+    nationality: Optional[str], origin: Optional[str], destination: Optional[str]
+) -> Optional[tuple[str, str]]:
+    """
+    Knowledge base key of a corridor: the traveller's country and the destination.
+
+    The origin stands in for an unknown nationality. Returns None when either country
+    is unknown.
+    """
+    traveller = canonical_country(nationality) or canonical_country(origin)
+    destination = canonical_country(destination)
+    if traveller is None or destination is None:
+        return None
+    return traveller, destination
+
+
+class KnowledgeBase:
+    """
+    Sources indexed by (nationality, destination, report section), stored in SQLite.
+
+    Args:
+        path: Location of the SQLite database file
+        max_age_seconds: Age past which sources are deleted (when the knowledge base is
+            opened and whenever sources are added), None to keep them
+    """
+
+    def __init__(self, path: str, max_age_seconds: Optional[float] = None):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "nationality TEXT NOT NULL, destination TEXT NOT NULL, section TEXT NOT NULL, "
+            "url TEXT NOT NULL, score REAL NOT NULL, updated_at REAL NOT NULL, "
+            "source TEXT NOT NULL, PRIMARY KEY (nationality, destination, section, url))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS documents_updated_at ON documents (updated_at)"
+        )
+        self._conn.commit()
+        if max_age_seconds is not None:
+            self.purge(max_age_seconds)
+
+    def lookup(
+        self, corridor: tuple[str, str], section: str, max_age_seconds: float, limit: int
+    ) -> list[dict]:
+        """Best scoring sources of a corridor section updated within max_age_seconds"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source FROM documents WHERE nationality = ? AND destination = ? "
+                "AND section = ? AND updated_at >= ? ORDER BY score DESC LIMIT ?",
+                (*corridor, section, time.time() - max_age_seconds, limit),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def add(self, corridor: tuple[str, str], section: str, sources: list[dict]) -> int:
+        """Store sources under a corridor section, replacing older copies of the same URLs"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents "
+                "(nationality, destination, section, url, score, updated_at, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        *corridor,
+                        section,
+                        source["url"],
+                        float(source.get("score") or 0),
+                        now,
+                        json.dumps(source),
+                    )
+                    for source in sources
+                ],
+            )
+            self._conn.commit()
+        if self.max_age_seconds is not None:
+            self.purge(self.max_age_seconds)
+        return len(sources)
+
+    def purge(self, max_age_seconds: float) -> int:
+        """Delete sources updated more than max_age_seconds ago; returns how many"""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM documents WHERE updated_at < ?", (time.time() - max_age_seconds,)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def ingest(
+        self,
+        corridor: tuple[str, str],
+        search_results: list[dict],
+        source_store: Optional[SourceStore] = None,
+    ) -> int:
+        """
+        Store past search results, each under the report sections its text is about.
+
+        Compact source references (see `SourceStore.to_ref`) get their page content back
+        from source_store first; references whose content expired, or that come without a
+        store, are skipped, as they only hold a snippet.
+
+        Returns:
+            int: Number of (section, source) entries written
+        """
+        if source_store is not None:
+            search_results = source_store.hydrate(search_results)
+        by_section: dict[str, list[dict]] = {}
+        for source in search_results:
+            if "content_hash" in source and not source.get("raw_content"):
+                continue
+            text = f"{source.get('title') or ''} {source.get('content') or ''}"
+            for section in find_sections(text):
+                by_section.setdefault(section, []).append(source)
+        return sum(self.add(corridor, section, sources) for section, sources in by_section.items())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+_knowledge_bases: dict[tuple, KnowledgeBase] = {}
+
+
+def get_knowledge_base(
+    backend: str, path: str, max_age_seconds: Optional[float] = None
+) -> Optional[KnowledgeBase]:
+    """
+    Return the process-wide knowledge base at path, or None when backend is "none".
+
+    Sources older than max_age_seconds (the longest section freshness window, past which
+    no lookup returns them) are deleted.
+    """
+    if backend == "none":
+        return None
+    if backend != "sqlite":
+        raise ValueError(f"Unknown knowledge base backend: {backend}")
+    settings = (path, max_age_seconds)
+    if settings not in _knowledge_bases:
+        _knowledge_bases[settings] = KnowledgeBase(path, max_age_seconds)
+    return _knowledge_bases[settings]
+
+
+def main():
+    """
+    Bulk-index past search results: `python -m src.knowledge ingest results.jsonl`
+
+    Each line of the file is a JSON object with `nationality`, `destination` (optionally
+    `origin`) and the `search_results` of a past run, e.g. a `src.batch` results file.
+    Source references in the results are loaded from the configured source store.
+    """
+    parser = argparse.ArgumentParser(description="Manage the local knowledge base")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest = subparsers.add_parser("ingest", help="index past search results from a JSONL file")
+    ingest.add_argument("file")
+    ingest.add_argument("--path", default=Configuration().knowledge_base_path)
+    ingest.add_argument("--sources-path", default=Configuration().source_store_path)
+    args = parser.parse_args()
+
+    configuration = Configuration()
+    knowledge_base = KnowledgeBase(args.path)
+    source_store = get_source_store(
+        configuration.source_store_backend,
+        args.sources_path,
+        configuration.source_store_ttl,
+        configuration.source_store_max_entries,
+    )
+    written = skipped = 0
+    with open(args.file) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            corridor = corridor_of(
+                record.get("nationality"), record.get("origin"), record.get("destination")
+            )
+            if corridor is None:
+                skipped += 1
+                continue
+            written += knowledge_base.ingest(
+                corridor, record.get("search_results") or [], source_store
+            )
+    print(f"Indexed {written} entries ({skipped} records without a known corridor skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import time
+from typing import Any, Optional, Type
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+from langgraph.store.base import BaseStore
+from pydantic import BaseModel
+
+from src.cache import CacheStats, InMemoryCache, make_cache_key
+
+
+def render_messages(messages: list[BaseMessage]) -> str:
+    """Render a message list into the text that identifies a prompt"""
+    return "\n\n".join(f"{message.type}: {message.content}" for message in messages)
+
+
+class LLMResponseCache:
+    """
+    Cache for structured-output LLM calls.
+
+    Exact hits are keyed on a hash of the rendered message list, the model name and
+    the output schema. With `similarity_threshold` set and a LangGraph store configured
+    with a vector index, prompts that are near-duplicates of an earlier one also reuse
+    its response. Only the last message (the varying input) is compared; the messages
+    before it (the system prompt, identical across calls of a node) must match exactly,
+    so a long shared prompt does not make every input look alike.
+
+    Args:
+        max_entries: Number of responses kept in memory
+        ttl_seconds: Seconds a cached response stays fresh
+        similarity_threshold: Minimum store similarity score for a near-duplicate hit,
+            or None to only serve exact hits
+    """
+
+    namespace = "llm_cache"
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600,
+        similarity_threshold: Optional[float] = None,
+    ):
+        self.exact = InMemoryCache(max_entries, ttl_seconds)
+        self.ttl_seconds = float(ttl_seconds)
+        self.similarity_threshold = similarity_threshold
+        self.semantic_stats = CacheStats()
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.exact.stats
+
+    @staticmethod
+    def make_key(
+        messages: list[BaseMessage], model_name: str, schema: Type[BaseModel]
+    ) -> str:
+        return make_cache_key(
+            render_messages(messages), model_name, schema.__name__, schema.model_json_schema()
+        )
+
+    async def ainvoke(
+        self,
+        structured_llm: Runnable,
+        messages: list[BaseMessage],
+        *,
+        model_name: str,
+        schema: Type[BaseModel],
+        store: Optional[BaseStore] = None,
+    ) -> BaseModel:
+        """Return a cached response for the prompt or invoke the structured LLM and cache its response"""
+        key = self.make_key(messages, model_name, schema)
+        cached = self.exact.get(key)
+        if cached is not None:
+            return schema.model_validate(cached)
+
+        namespace = (
+            self.namespace,
+            model_name,
+            schema.__name__,
+            make_cache_key(render_messages(messages[:-1])),
+        )
+        prompt = str(messages[-1].content)
+        semantic = store is not None and self.similarity_threshold is not None
+
+        if semantic:
+            cached = await self._asearch_similar(store, namespace, prompt)
+            if cached is not None:
+                self.exact.set(key, cached)
+                return schema.model_validate(cached)
+
+        response = await structured_llm.ainvoke(messages)
+        value = response.model_dump()
+        self.exact.set(key, value)
+
+        if semantic:
+            await store.aput(
+                namespace,
+                key,
+                {"prompt": prompt, "response": value, "created_at": time.time()},
+                index=["prompt"],
+            )
+
+        return response
+
+    async def _asearch_similar(
+        self, store: BaseStore, namespace: tuple[str, ...], prompt: str
+    ) -> Optional[dict[str, Any]]:
+        """Look up the most similar earlier input in the store's vector index"""
+        items = await store.asearch(namespace, query=prompt, limit=1)
+        for item in items:
+            # Stores without a vector index return unscored items
+            if item.score is None or item.score < self.similarity_threshold:
+                continue
+            if time.time() - item.value.get("created_at", 0) > self.ttl_seconds:
+                await store.adelete(namespace, item.key)
+                continue
+            self.semantic_stats.hits += 1
+            return item.value["response"]
+
+        self.semantic_stats.misses += 1
+        return None
+
+
+_llm_caches: dict[tuple, LLMResponseCache] = {}
+
+
+def get_llm_cache(
+    backend: str,
+    max_entries: int,
+    ttl_seconds: float,
+    similarity_threshold: Optional[float] = None,
+) -> Optional[LLMResponseCache]:
+    """
+    Return the process-wide LLM response cache for the given settings.
+
+    Args:
+        backend: "memory" to cache responses in process, "none" to disable caching
+        max_entries: Number of responses kept in memory
+        ttl_seconds: Seconds a cached response stays fresh
+        similarity_threshold: Minimum similarity for near-duplicate hits, or None for exact hits only
+    """
+    if backend == "none":
+        return None
+    if backend != "memory":
+        raise ValueError(f"Unknown LLM cache backend: {backend}")
+
+    settings = (int(max_entries), float(ttl_seconds), similarity_threshold)
+    if settings not in _llm_caches:
+        _llm_caches[settings] = LLMResponseCache(max_entries, ttl_seconds, similarity_threshold)
+    return _llm_caches[settings]
@@ -0,0 +1,174 @@
+import logging
+from typing import Iterable, Iterator, Optional
+
+from src.telemetry import record
+from src.tokens import allocate_token_budget, count_tokens, select_passages, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_MARKER = "... [truncated]"
+
+
+class PromptWriter:
+    """
+    Assembles a prompt from pieces, joined once at the end instead of growing one string.
+
+    With max_tokens, pieces are counted as they are written and the piece that crosses
+    the budget is cut short; everything written after that is dropped, so a generator
+    feeding `write_all` is not consumed past the budget.
+
+    Args:
+        max_tokens: Token budget for the whole prompt, None for no limit
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens
+        self.parts: list[str] = []
+        self.chars = 0
+        self.tokens = 0
+        self.truncated = False
+
+    def write(self, text: str) -> bool:
+        """Append a piece; returns False once the budget is spent"""
+        if self.truncated:
+            return False
+        if self.max_tokens is not None:
+            tokens = count_tokens(text)
+            if self.tokens + tokens > self.max_tokens:
+                text = truncate_to_tokens(text, self.max_tokens - self.tokens) + TRUNCATION_MARKER
+                tokens = self.max_tokens - self.tokens
+                self.truncated = True
+            self.tokens += tokens
+        self.parts.append(text)
+        self.chars += len(text)
+        return not self.truncated
+
+    def write_all(self, pieces: Iterable[str]) -> bool:
+        """Append pieces until they run out or the budget is spent"""
+        for piece in pieces:
+            if not self.write(piece):
+                return False
+        return True
+
+    def getvalue(self) -> str:
+        return "".join(self.parts)
+
+
+def iter_source_sections(
+    sources_list: list[dict],
+    budgets: list[int],
+    include_raw_content: bool = True,
+    query: Optional[str] = None,
+    missing: Optional[list[str]] = None,
+) -> Iterator[str]:
+    """
+    Yield the formatted section of each source, limiting its raw_content to its budget.
+
+    Passages are only selected when a section is requested, so a writer that stops early
+    skips the work for the remaining sources. URLs of sources without raw_content are
+    appended to missing.
+    """
+    for source, source_budget in zip(sources_list, budgets):
+        parts = [
+            f"Source {source['title']}:\n===\n",
+            f"URL: {source['url']}\n===\n",
+            f"Most relevant content from source: {source['content']}\n===\n",
+        ]
+        if include_raw_content:
+            raw_content = source.get("raw_content", "")
+            if raw_content is None:
+                raw_content = ""
+                if missing is not None:
+                    missing.append(source["url"])
+            if query:
+                limited_content = select_passages(raw_content, query, source_budget)
+            else:
+                limited_content = truncate_to_tokens(raw_content, source_budget)
+            if limited_content != raw_content:
+                limited_content += TRUNCATION_MARKER
+            parts.append(
+                f"Full source content limited to {source_budget} tokens: {limited_content}\n\n"
+            )
+        yield "".join(parts)
+
+
+def iter_note_sections(completed_notes: list[str]) -> Iterator[str]:
+    """Yield the formatted section of each research note"""
+    separator = "=" * 60
+    for idx, company_notes in enumerate(completed_notes, 1):
+        yield f"""
+{separator}
+Note: {idx}:
+{separator}
+Notes from research:
+{company_notes}"""
+
+
+def _report(name: str, writer: PromptWriter, sections: int) -> None:
+    record("prompt_chars", writer.chars)
+    if writer.truncated:
+        record("prompt_truncations", 1)
+        logger.warning(
+            "%s prompt cut at its %d token budget after %d sections",
+            name,
+            writer.max_tokens,
+            len(writer.parts),
+        )
+    logger.debug(
+        "%s prompt: %d of %d sections, %d chars", name, len(writer.parts), sections, writer.chars
+    )
+
+
+def format_sources(
+    sources_list: list[dict],
+    include_raw_content: bool = True,
+    max_tokens_per_source: int = 1000,
+    query: Optional[str] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """
+    Takes a list of unique results from Tavily API and formats them.
+    Limits the raw_content to max_tokens_per_source tokens, or, when token_budget is given,
+    spreads that budget over the sources by relevance score and keeps the passages most
+    relevant to the query.
+    include_raw_content specifies whether to include the raw_content from Tavily in the formatted string.
+
+    Args:
+        sources_list: list of unique results from Tavily API
+        max_tokens_per_source: int, maximum number of tokens per each search result to include in the formatted string
+        include_raw_content: bool, whether to include the raw_content from Tavily in the formatted string
+        query: str, text the selected passages should be relevant to
+        token_budget: int, total number of raw_content tokens shared by all sources
+
+    Returns:
+        str: Formatted string with deduplicated sources
+    """
+    if include_raw_content and token_budget is not None:
+        budgets = allocate_token_budget(sources_list, token_budget)
+    else:
+        budgets = [max_tokens_per_source] * len(sources_list)
+
+    missing: list[str] = []
+    writer = PromptWriter()
+    writer.write("Sources:\n\n")
+    writer.write_all(
+        iter_source_sections(sources_list, budgets, include_raw_content, query, missing)
+    )
+    if missing:
+        record("sources_missing_content", len(missing))
+        logger.info("No raw_content for %d sources: %s", len(missing), ", ".join(missing))
+    _report("Sources", writer, len(sources_list) + 1)
+    return writer.getvalue().strip()
+
+
+def format_all_notes(completed_notes: list[str], token_budget: Optional[int] = None) -> str:
+    """
+    Format a list of notes into a string.
+
+    With token_budget, notes are kept in order until the budget is spent; the note that
+    crosses it is truncated and later ones are left out.
+    """
+    writer = PromptWriter(token_budget)
+    writer.write_all(iter_note_sections(completed_notes))
+    _report("Notes", writer, len(completed_notes))
+    return writer.getvalue()
@@ -0,0 +1,53 @@
+from typing import Any
+
+# Heading of each report section and the `TravelRequirements` fields it is made of
+SECTION_TITLES = {
+    "visa": "Visa Requirements",
+    "passport": "Passport Requirements",
+    "advisory": "Travel Advisories",
+    "documents": "Additional Documents",
+}
+
+SECTION_FIELDS = {
+    "visa": ("visa_required", "visa_type", "processing_time", "visa_notes"),
+    "passport": ("passport_validity", "passport_notes"),
+    "advisory": ("advisories",),
+    "documents": ("documents",),
+}
+
+
+def section_values(info: dict[str, Any], section: str) -> list[Any]:
+    """The populated field values of a report section"""
+    return [
+        info[name] for name in SECTION_FIELDS[section] if info.get(name) not in (None, "", [])
+    ]
+
+
+def render_requirements(info: dict[str, Any] | str) -> str:
+    """
+    Render extracted travel requirements as compact text for prompts, one heading per
+    report section. Text info (corridor cache entries written before extraction was
+    structured) is returned as it is.
+    """
+    if isinstance(info, str):
+        return info
+
+    lines = []
+    for section, title in SECTION_TITLES.items():
+        lines.append(title)
+        for name in SECTION_FIELDS[section]:
+            value = info.get(name)
+            if value in (None, "", []):
+                continue
+            if isinstance(value, list):
+                lines.extend(f"- {item}" for item in value)
+            else:
+                if isinstance(value, bool):
+                    value = "yes" if value else "no"
+                lines.append(f"- {name.replace('_', ' ').capitalize()}: {value}")
+        if not section_values(info, section):
+            lines.append("- Not found in research")
+    if info.get("sources"):
+        lines.append("Sources")
+        lines.extend(f"- {url}" for url in info["sources"])
+    return "\n".join(lines)
@@ -0,0 +1,412 @@
+import re
+from dataclasses import dataclass, field
+from typing import Literal, Optional
+
+from src.corridor import SECTIONS
+
+# Country name, demonym, and other names the country goes by
+COUNTRIES = [
+    ("Afghanistan", "Afghan", []),
+    ("Albania", "Albanian", []),
+    ("Algeria", "Algerian", []),
+    ("Andorra", "Andorran", []),
+    ("Angola", "Angolan", []),
+    ("Antigua and Barbuda", "Antiguan", ["Antigua"]),
+    ("Argentina", "Argentine", ["Argentinian"]),
+    ("Armenia", "Armenian", []),
+    ("Australia", "Australian", []),
+    ("Austria", "Austrian", []),
+    ("Azerbaijan", "Azerbaijani", []),
+    ("Bahamas", "Bahamian", ["The Bahamas"]),
+    ("Bahrain", "Bahraini", []),
+    ("Bangladesh", "Bangladeshi", []),
+    ("Barbados", "Barbadian", []),
+    ("Belarus", "Belarusian", []),
+    ("Belgium", "Belgian", []),
+    ("Belize", "Belizean", []),
+    ("Benin", "Beninese", []),
+    ("Bhutan", "Bhutanese", []),
+    ("Bolivia", "Bolivian", []),
+    ("Bosnia and Herzegovina", "Bosnian", ["Bosnia"]),
+    ("Botswana", "Motswana", ["Batswana"]),
+    ("Brazil", "Brazilian", []),
+    ("Brunei", "Bruneian", []),
+    ("Bulgaria", "Bulgarian", []),
+    ("Burkina Faso", "Burkinabe", []),
+    ("Burundi", "Burundian", []),
+    ("Cambodia", "Cambodian", []),
+    ("Cameroon", "Cameroonian", []),
+    ("Canada", "Canadian", []),
+    ("Cape Verde", "Cape Verdean", ["Cabo Verde"]),
+    ("Central African Republic", "Central African", ["CAR"]),
+    ("Chad", "Chadian", []),
+    ("Chile", "Chilean", []),
+    ("China", "Chinese", ["PRC", "Mainland China"]),
+    ("Colombia", "Colombian", []),
+    ("Comoros", "Comorian", []),
+    ("Congo", "Congolese", ["Republic of the Congo", "DRC", "DR Congo",
+                            "Democratic Republic of the Congo"]),
+    ("Costa Rica", "Costa Rican", []),
+    ("Croatia", "Croatian", []),
+    ("Cuba", "Cuban", []),
+    ("Cyprus", "Cypriot", []),
+    ("Czech Republic", "Czech", ["Czechia"]),
+    ("Denmark", "Danish", ["Dane"]),
+    ("Djibouti", "Djiboutian", []),
+    ("Dominican Republic", "Dominican", []),
+    ("Dominica", "Dominican", []),
+    ("Ecuador", "Ecuadorian", []),
+    ("Egypt", "Egyptian", []),
+    ("El Salvador", "Salvadoran", []),
+    ("Equatorial Guinea", "Equatorial Guinean", []),
+    ("Eritrea", "Eritrean", []),
+    ("Estonia", "Estonian", []),
+    ("Eswatini", "Swazi", ["Swaziland"]),
+    ("Ethiopia", "Ethiopian", []),
+    ("Fiji", "Fijian", []),
+    ("Finland", "Finnish", ["Finn"]),
+    ("France", "French", []),
+    ("Gabon", "Gabonese", []),
+    ("Gambia", "Gambian", ["The Gambia"]),
+    ("Georgia", "Georgian", []),
+    ("Germany", "German", []),
+    ("Ghana", "Ghanaian", []),
+    ("Greece", "Greek", []),
+    ("Grenada", "Grenadian", []),
+    ("Guatemala", "Guatemalan", []),
+    ("Guinea", "Guinean", []),
+    ("Guinea-Bissau", "Bissau-Guinean", []),
+    ("Guyana", "Guyanese", []),
+    ("Haiti", "Haitian", []),
+    ("Honduras", "Honduran", []),
+    ("Hong Kong", "Hong Konger", []),
+    ("Hungary", "Hungarian", []),
+    ("Iceland", "Icelandic", ["Icelander"]),
+    ("India", "Indian", []),
+    ("Indonesia", "Indonesian", []),
+    ("Iran", "Iranian", []),
+    ("Iraq", "Iraqi", []),
+    ("Ireland", "Irish", ["Republic of Ireland"]),
+    ("Israel", "Israeli", []),
+    ("Italy", "Italian", []),
+    ("Ivory Coast", "Ivorian", ["Cote d'Ivoire", "Côte d'Ivoire"]),
+    ("Jamaica", "Jamaican", []),
+    ("Japan", "Japanese", []),
+    ("Jordan", "Jordanian", []),
+    ("Kazakhstan", "Kazakh", ["Kazakhstani"]),
+    ("Kenya", "Kenyan", []),
+    ("Kiribati", "I-Kiribati", []),
+    ("Kosovo", "Kosovar", []),
+    ("Kuwait", "Kuwaiti", []),
+    ("Kyrgyzstan", "Kyrgyz", []),
+    ("Laos", "Lao", ["Laotian"]),
+    ("Latvia", "Latvian", []),
+    ("Lebanon", "Lebanese", []),
+    ("Lesotho", "Basotho", ["Mosotho"]),
+    ("Liberia", "Liberian", []),
+    ("Libya", "Libyan", []),
+    ("Liechtenstein", "Liechtensteiner", []),
+    ("Lithuania", "Lithuanian", []),
+    ("Luxembourg", "Luxembourgish", ["Luxembourger"]),
+    ("Madagascar", "Malagasy", []),
+    ("Malawi", "Malawian", []),
+    ("Malaysia", "Malaysian", []),
+    ("Maldives", "Maldivian", []),
+    ("Mali", "Malian", []),
+    ("Malta", "Maltese", []),
+    ("Marshall Islands", "Marshallese", []),
+    ("Mauritania", "Mauritanian", []),
+    ("Mauritius", "Mauritian", []),
+    ("Mexico", "Mexican", []),
+    ("Micronesia", "Micronesian", []),
+    ("Moldova", "Moldovan", []),
+    ("Monaco", "Monegasque", []),
+    ("Mongolia", "Mongolian", []),
+    ("Montenegro", "Montenegrin", []),
+    ("Morocco", "Moroccan", []),
+    ("Mozambique", "Mozambican", []),
+    ("Myanmar", "Burmese", ["Burma"]),
+    ("Namibia", "Namibian", []),
+    ("Nauru", "Nauruan", []),
+    ("Nepal", "Nepali", ["Nepalese"]),
+    ("Netherlands", "Dutch", ["Holland", "The Netherlands"]),
+    ("New Zealand", "New Zealander", ["NZ", "Kiwi"]),
+    ("Nicaragua", "Nicaraguan", []),
+    ("Niger", "Nigerien", []),
+    ("Nigeria", "Nigerian", []),
+    ("North Korea", "North Korean", ["DPRK"]),
+    ("North Macedonia", "Macedonian", ["Macedonia"]),
+    ("Norway", "Norwegian", []),
+    ("Oman", "Omani", []),
+    ("Pakistan", "Pakistani", []),
+    ("Palau", "Palauan", []),
+    ("Palestine", "Palestinian", []),
+    ("Panama", "Panamanian", []),
+    ("Papua New Guinea", "Papua New Guinean", ["PNG"]),
+    ("Paraguay", "Paraguayan", []),
+    ("Peru", "Peruvian", []),
+    ("Philippines", "Filipino", ["The Philippines", "Philippine"]),
+    ("Poland", "Polish", ["Pole"]),
+    ("Portugal", "Portuguese", []),
+    ("Qatar", "Qatari", []),
+    ("Romania", "Romanian", []),
+    ("Russia", "Russian", ["Russian Federation"]),
+    ("Rwanda", "Rwandan", []),
+    ("Saint Kitts and Nevis", "Kittitian", ["St Kitts"]),
+    ("Saint Lucia", "Saint Lucian", ["St Lucia"]),
+    ("Saint Vincent and the Grenadines", "Vincentian", ["St Vincent"]),
+    ("Samoa", "Samoan", []),
+    ("San Marino", "Sammarinese", []),
+    ("Sao Tome and Principe", "Sao Tomean", []),
+    ("Saudi Arabia", "Saudi", ["KSA"]),
+    ("Senegal", "Senegalese", []),
+    ("Serbia", "Serbian", []),
+    ("Seychelles", "Seychellois", []),
+    ("Sierra Leone", "Sierra Leonean", []),
+    ("Singapore", "Singaporean", []),
+    ("Slovakia", "Slovak", ["Slovakian"]),
+    ("Slovenia", "Slovenian", ["Slovene"]),
+    ("Solomon Islands", "Solomon Islander", []),
+    ("Somalia", "Somali", []),
+    ("South Africa", "South African", []),
+    ("South Korea", "South Korean", ["Korea", "Republic of Korea"]),
+    ("South Sudan", "South Sudanese", []),
+    ("Spain", "Spanish", ["Spaniard"]),
+    ("Sri Lanka", "Sri Lankan", []),
+    ("Sudan", "Sudanese", []),
+    ("Suriname", "Surinamese", []),
+    ("Sweden", "Swedish", ["Swede"]),
+    ("Switzerland", "Swiss", []),
+    ("Syria", "Syrian", []),
+    ("Taiwan", "Taiwanese", []),
+    ("Tajikistan", "Tajik", []),
+    ("Tanzania", "Tanzanian", []),
+    ("Thailand", "Thai", []),
+    ("Timor-Leste", "Timorese", ["East Timor"]),
+    ("Togo", "Togolese", []),
+    ("Tonga", "Tongan", []),
+    ("Trinidad and Tobago", "Trinidadian", ["Trinidad"]),
+    ("Tunisia", "Tunisian", []),
+    ("Turkey", "Turkish", ["Türkiye", "Turkiye"]),
+    ("Turkmenistan", "Turkmen", []),
+    ("Tuvalu", "Tuvaluan", []),
+    ("Uganda", "Ugandan", []),
+    ("Ukraine", "Ukrainian", []),
+    ("United Arab Emirates", "Emirati", ["UAE", "Emirates"]),
+    ("United Kingdom", "British", ["UK", "U.K.", "Britain", "Great Britain", "England",
+                                   "Scotland", "Wales", "Northern Ireland"]),
+    ("United States", "American", ["USA", "U.S.A.", "US", "U.S.", "United States of America",
+                                   "America"]),
+    ("Uruguay", "Uruguayan", []),
+    ("Uzbekistan", "Uzbek", []),
+    ("Vanuatu", "Ni-Vanuatu", []),
+    ("Vatican City", "Vatican", ["Holy See"]),
+    ("Venezuela", "Venezuelan", []),
+    ("Vietnam", "Vietnamese", ["Viet Nam"]),
+    ("Yemen", "Yemeni", []),
+    ("Zambia", "Zambian", []),
+    ("Zimbabwe", "Zimbabwean", []),
+]
+
+# Words that ask about a report section, per section
+DOCUMENT_KEYWORDS = {
+    "visa": ["visa", "visas", "evisa", "e-visa", "eta", "esta", "visa-free", "visa free",
+             "entry permit", "entry requirements", "work permit", "residence permit"],
+    "passport": ["passport", "passports", "passport validity", "blank pages"],
+    "advisory": ["advisory", "advisories", "travel warning", "safe to travel", "safety"],
+    "documents": ["documents", "document", "paperwork", "vaccination", "vaccine",
+                  "yellow fever", "insurance", "invitation letter", "proof of funds",
+                  "return ticket", "need to travel", "what do i need"],
+}
+
+# Short messages that carry no task, and the reply each kind gets
+CHIT_CHAT = {
+    "greeting": re.compile(
+        r"^(hi|hello|hey|hiya|howdy|good (morning|afternoon|evening)|greetings)"
+        r"( there)?( \w+)?[!. ]*$"
+    ),
+    "thanks": re.compile(
+        r"^((thank you|thanks|thx|cheers|ty)( (so|very) much)?( for (that|this|the help|your help))?"
+        r"|(great|perfect|awesome|ok|okay|cool),? thanks?( a lot)?)[!. ]*$"
+    ),
+    "farewell": re.compile(r"^(bye|goodbye|see you|see ya|that's all|that is all|no,? that's it)[!. ]*$"),
+}
+
+CHIT_CHAT_REPLIES = {
+    "greeting": (
+        "Hi {user_name}! I'm {assistant_name}. Tell me your nationality and where you're "
+        "travelling, and I'll look up the visa, passport and document requirements for you."
+    ),
+    "thanks": "You're welcome, {user_name}! Let me know if you have another trip to check.",
+    "farewell": "Safe travels, {user_name}!",
+}
+
+# Phrases placing a country before it in a role
+_NATIONALITY_CUES = re.compile(
+    r"(citizen of|national of|passport (from|of)|i am from|i'm from|im from|born in)\s*$"
+)
+_NATIONALITY_SUFFIX_CUES = re.compile(r"^\s*(citizens?|nationals?|passports?|passport holders?)\b")
+# Multi-leg trips and other travellers need the LLM to work out whose corridor is meant
+_AMBIGUITY_CUES = re.compile(
+    r"\b(transit|layover|stopover|connecting flight"
+    r"|my (wife|husband|partner|friend|son|daughter|kids?|children|parents?|mother|father))\b"
+)
+_ORIGIN_CUES = re.compile(r"(from|leaving|departing|living in|live in|based in|resident of)\s*$")
+_DESTINATION_CUES = re.compile(
+    r"(to|visit|visiting|into|enter|entering|for|travel to|going to|trip to|fly to|move to)\s*$"
+)
+
+
+def _alias_pattern() -> tuple[re.Pattern, dict[str, tuple[str, bool]]]:
+    aliases: dict[str, tuple[str, bool]] = {}
+    for country, demonym, others in COUNTRIES:
+        aliases.setdefault(country.lower(), (country, False))
+        for other in others:
+            aliases.setdefault(other.lower(), (country, False))
+        aliases.setdefault(demonym.lower(), (country, True))
+    # Longest names first, so "South Sudan" wins over "Sudan"
+    names = sorted(aliases, key=len, reverse=True)
+    pattern = re.compile(
+        r"(?<![\w.])(" + "|".join(re.escape(name) for name in names) + r")s?(?!\w)"
+    )
+    return pattern, aliases
+
+
+_COUNTRY_PATTERN, _ALIASES = _alias_pattern()
+_DEMONYMS = {country: demonym for country, demonym, _ in COUNTRIES}
+# Names that are also common English words only count when spelled as a name
+_UPPER_CASE_ONLY = {"us", "car", "eta"}
+_CAPITALIZED_ONLY = {
+    "chad", "georgia", "jordan", "turkey", "guinea", "kiwi", "pole", "dane", "finn", "swede",
+    "china", "lao", "niger",
+}
+
+
+@dataclass
+class RouteDecision:
+    """Outcome of the heuristic router for one message."""
+
+    kind: Literal["corridor", "chit_chat", "ambiguous"]
+    confidence: float
+    nationality: Optional[str] = None
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    sections: list[str] = field(default_factory=list)
+    chit_chat: Optional[str] = None
+
+
+def find_countries(text: str) -> list[tuple[str, bool, int, int]]:
+    """
+    Find country mentions in a text.
+
+    Returns:
+        list: (country, mentioned by demonym, start, end) per mention, in order of appearance
+    """
+    mentions = []
+    for match in _COUNTRY_PATTERN.finditer(text.lower()):
+        name = match.group(1)
+        original = text[match.start() : match.end()]
+        if name in _UPPER_CASE_ONLY and original != original.upper():
+            continue
+        if name in _CAPITALIZED_ONLY and not original[0].isupper():
+            continue
+        country, is_demonym = _ALIASES[name]
+        mentions.append((country, is_demonym, match.start(), match.end()))
+    return mentions
+
+
+def canonical_country(name: Optional[str]) -> Optional[str]:
+    """Country a name, alias or demonym refers to (e.g. "Kenyan" -> "Kenya"), or None"""
+    if not name:
+        return None
+    lowered = " ".join(name.lower().split())
+    if lowered.startswith("the "):
+        lowered = lowered[4:]
+    match = _ALIASES.get(lowered) or _ALIASES.get(lowered.rstrip("s"))
+    return match[0] if match else None
+
+
+def find_sections(text: str) -> list[str]:
+    """Report sections a text asks about"""
+    lowered = text.lower()
+    return [
+        section
+        for section, keywords in DOCUMENT_KEYWORDS.items()
+        if any(re.search(rf"(?<!\w){re.escape(keyword)}(?!\w)", lowered) for keyword in keywords)
+    ]
+
+
+def classify_message(text: str) -> RouteDecision:
+    """
+    Classify a user message without an LLM call.
+
+    Messages naming one destination and the traveller's nationality together with a
+    document keyword are clear corridor queries; short greetings, thanks and farewells are
+    chit-chat. Everything else is ambiguous and left to the LLM, including messages with
+    several candidate destinations and those that only give where the traveller is from,
+    which does not say what passport they hold.
+
+    Args:
+        text: The latest user message
+
+    Returns:
+        RouteDecision: The message kind, a confidence in [0, 1] and the extracted corridor
+    """
+    normalized = " ".join(text.lower().split())
+    for kind, pattern in CHIT_CHAT.items():
+        if pattern.match(normalized):
+            return RouteDecision(kind="chit_chat", confidence=0.95, chit_chat=kind)
+
+    mentions = find_countries(text)
+    sections = find_sections(text)
+    if not mentions:
+        return RouteDecision(kind="ambiguous", confidence=0.0, sections=sections)
+
+    nationality = origin = destination = None
+    lowered = text.lower()
+    for country, is_demonym, start, end in mentions:
+        before = lowered[max(0, start - 24) : start]
+        if is_demonym and nationality is None:
+            nationality = country
+        elif nationality is None and (
+            _NATIONALITY_CUES.search(before) or _NATIONALITY_SUFFIX_CUES.match(lowered[end:])
+        ):
+            nationality = country
+        elif _ORIGIN_CUES.search(before) and origin is None:
+            origin = country
+        elif _DESTINATION_CUES.search(before) and destination is None:
+            destination = country
+
+    # Two countries with no role cues: the first is where the traveller is from
+    countries = list(dict.fromkeys(country for country, *_ in mentions))
+    if destination is None and len(countries) >= 2:
+        destination = next(
+            (country for country in reversed(countries) if country not in (nationality, origin)),
+            None,
+        )
+    if destination is not None and nationality is None and origin is None:
+        others = [country for country in countries if country != destination]
+        origin = others[0] if others else None
+
+    nationalities = {country for country, is_demonym, *_ in mentions if is_demonym}
+    destinations = [country for country in countries if country not in (nationality, origin)]
+    if destination is None or (nationality is None and origin is None):
+        confidence = 0.3 if sections else 0.1
+    elif not sections:
+        confidence = 0.6
+    elif nationality is not None:
+        confidence = 0.95
+    else:
+        # Where the traveller is from leaves their nationality to the LLM
+        confidence = 0.4
+    if len(nationalities) > 1 or len(destinations) > 1 or _AMBIGUITY_CUES.search(lowered):
+        confidence = min(confidence, 0.4)
+
+    return RouteDecision(
+        kind="corridor" if confidence >= 0.5 else "ambiguous",
+        confidence=confidence,
+        nationality=_DEMONYMS[nationality] if nationality else None,
+        origin=origin,
+        destination=destination,
+        sections=sections or list(SECTIONS),
+    )
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 class RouteUserQuery(BaseModel):
@@ -19,6 +21,28 @@ class RouteUserQuery(BaseModel):
             "Populate this only if `is_satisfactory` is True; otherwise, set to null."
         )
     )
+    nationality: Optional[str] = Field(
+        default=None,
+        description="Nationality of the traveller (e.g. 'Kenyan'), if stated; otherwise null.",
+    )
+    origin: Optional[str] = Field(
+        default=None,
+        description="Country the traveller is departing from, if stated; otherwise null.",
+    )
+    destination: Optional[str] = Field(
+        default=None,
+        description="Country the traveller is going to, if stated; otherwise null.",
+    )
+
+
+class RouteAndPlanQuery(RouteUserQuery):
+    search_queries: list[str] = Field(
+        default_factory=list,
+        description=(
+            "Web search queries researching the refined query. "
+            "Populate this only if `is_satisfactory` is True; otherwise, an empty list."
+        ),
+    )
 
 
     
@@ -39,4 +63,42 @@ class ReflectionOutput(BaseModel):
     search_queries: list[str] = Field(
         description="If is_satisfactory is False, provide 5 targeted search queries to find the missing information"
     )
-    reasoning: str = Field(description="Brief explanation of the assessment")
\ No newline at end of file
+    reasoning: str = Field(description="Brief explanation of the assessment")
+
+class TravelRequirements(BaseModel):
+    visa_required: Optional[bool] = Field(
+        default=None,
+        description="True if the traveller needs a visa for the trip, False if not; null if the notes do not say.",
+    )
+    visa_type: Optional[str] = Field(
+        default=None,
+        description="Name of the visa or entry authorisation to apply for (e.g. 'Standard Visitor visa'); null if unknown.",
+    )
+    processing_time: Optional[str] = Field(
+        default=None,
+        description="How long the visa application usually takes (e.g. '3 weeks'); null if unknown.",
+    )
+    visa_notes: list[str] = Field(
+        default_factory=list,
+        description="Other visa facts as short points: fees, where and how to apply, allowed stay.",
+    )
+    passport_validity: Optional[str] = Field(
+        default=None,
+        description="How long the passport must be valid for (e.g. '6 months beyond the stay'); null if unknown.",
+    )
+    passport_notes: list[str] = Field(
+        default_factory=list,
+        description="Other passport requirements as short points (e.g. blank pages).",
+    )
+    advisories: list[str] = Field(
+        default_factory=list,
+        description="Current travel advisories and safety warnings for the destination, as short points.",
+    )
+    documents: list[str] = Field(
+        default_factory=list,
+        description="Additional documents to carry, as short points (e.g. proof of funds, vaccination certificates).",
+    )
+    sources: list[str] = Field(
+        default_factory=list,
+        description="URLs of the sources the information comes from.",
+    )
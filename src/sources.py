@@ -0,0 +1,86 @@
+import hashlib
+from typing import Optional
+
+from src.cache import InMemoryCache, TieredCache, make_cache_backend
+
+# Characters of a source's `content` snippet kept in its reference
+SNIPPET_CHARS = 500
+
+
+class SourceStore:
+    """
+    Side store holding the full page content of sources by content hash.
+
+    The graph state only carries compact source references (see `to_ref`); the page
+    content they point to is loaded from here when it is actually needed.
+
+    Args:
+        backend: The cache storing page contents
+    """
+
+    def __init__(self, backend: InMemoryCache | TieredCache):
+        self.backend = backend
+
+    def put(self, text: str) -> str:
+        """Store a page content and return its hash"""
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if self.backend.get(key) is None:
+            self.backend.set(key, text)
+        return key
+
+    def get(self, key: str) -> Optional[str]:
+        return self.backend.get(key)
+
+    def to_ref(self, source: dict) -> dict:
+        """
+        Compact reference to a search result: url, title, score, the `content` snippet and
+        the `content_hash` of its page content, which is moved into the store.
+        """
+        ref = {
+            "url": source["url"],
+            "title": source.get("title"),
+            "score": source.get("score"),
+            "content": (source.get("content") or "")[:SNIPPET_CHARS],
+        }
+        if source.get("raw_content"):
+            ref["content_hash"] = self.put(source["raw_content"])
+        return ref
+
+    def hydrate(self, sources: list[dict]) -> list[dict]:
+        """
+        Sources with their page content loaded back into `raw_content`.
+
+        References whose content expired from the store keep `raw_content` as None.
+        Sources that are not references are returned as they are.
+        """
+        hydrated = []
+        for source in sources:
+            if "content_hash" in source and "raw_content" not in source:
+                source = {**source, "raw_content": self.get(source["content_hash"])}
+            hydrated.append(source)
+        return hydrated
+
+
+_source_stores: dict[tuple, SourceStore] = {}
+
+
+def get_source_store(
+    backend: str, path: str, ttl_seconds: float, max_entries: int
+) -> Optional[SourceStore]:
+    """
+    Return the process-wide source store, or None when backend is "none" (the state then
+    carries full search results).
+
+    Args:
+        backend: "memory" or "sqlite" (see `make_cache_backend`), or "none"
+        path: SQLite database path used by the "sqlite" backend
+        ttl_seconds: Seconds a page content is kept
+        max_entries: Page contents kept in memory
+    """
+    settings = (backend, path, float(ttl_seconds), int(max_entries))
+    if settings not in _source_stores:
+        cache = make_cache_backend(backend, path, ttl_seconds, max_entries, "source_content")
+        if cache is None:
+            return None
+        _source_stores[settings] = SourceStore(cache)
+    return _source_stores[settings]
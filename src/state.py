@@ -1,10 +1,32 @@
 from dataclasses import dataclass, field
 from typing import Any, Optional, Annotated, List
-import operator
 from langgraph.graph.message import add_messages, BaseMessage
 
+from src.dedup import canonicalize_url
 
 
+def extend_or_reset(existing: Optional[list], new: Optional[list]) -> list:
+    """Reducer appending new items to the existing ones; None starts the list over"""
+    if new is None:
+        return []
+    return (existing or []) + new
+
+
+def merge_search_results(
+    existing: Optional[list[dict]], new: Optional[list[dict]]
+) -> Optional[list[dict]]:
+    """
+    Reducer appending new search results to the existing ones, skipping URLs already
+    present; None starts the list over.
+    """
+    if new is None:
+        return None
+    if existing is None:
+        return new
+    urls = {canonicalize_url(source["url"]) for source in existing}
+    return existing + [
+        source for source in new if canonicalize_url(source["url"]) not in urls
+    ]
 
 
 @dataclass(kw_only=True)
@@ -25,20 +47,56 @@ class AgentState:
     user_query: str = field(default=None)
     "query provided by the user."
 
+    nationality: str = field(default=None)
+    "Nationality of the traveller"
+
+    origin: str = field(default=None)
+    "Country the traveller is departing from"
+
+    destination: str = field(default=None)
+    "Country the traveller is going to"
+
+    corridor_key: str = field(default=None)
+    "Cache key of the travel corridor the query is about"
+
+    refreshed_sections: list[str] = field(default_factory=list)
+    "Report sections researched during this run, to be written back to the corridor cache"
+
+    started_at: float = field(default=None)
+    "Unix time at which the current run started"
+
+    conversation_summary: str = field(default=None)
+    "Rolling summary of the messages older than the history window"
+
+    summarized_messages_count: int = field(default=0)
+    "Number of leading messages folded into conversation_summary"
+
 
     search_queries: list[str] = field(default=None)
     "List of generated search queries to find relevant information"
 
-    search_results: list[dict] = field(default=None)
-    "List of search results"
+    planned_queries: Optional[list[str]] = field(default=None)
+    "Search queries the agent turn already wrote (speculatively or in its own LLM call), researched instead of calling generate_queries"
+
+    search_results: Annotated[list[dict], merge_search_results] = field(default=None)
+    "List of search results, accumulated across research steps and parallel branches"
 
-    completed_notes: Annotated[list, operator.add] = field(default_factory=list)
+    completed_notes: Annotated[list, extend_or_reset] = field(default_factory=list)
     "Notes from completed research related to the schema"
 
+    issued_queries: Annotated[list[str], extend_or_reset] = field(default_factory=list)
+    "Search queries already run, skipped by later research steps in incremental mode"
+
+    seen_urls: Annotated[list[str], extend_or_reset] = field(default_factory=list)
+    "URLs of sources already researched, skipped by later research steps in incremental mode"
+
+    extracted_notes_count: int = field(default=0)
+    "Number of completed notes already merged into info"
+
     info: dict[str, Any] = field(default=None)
     """
     A dictionary containing the extracted and processed information
-    based on the user's query and the graph's execution.
+    based on the user's query and the graph's execution (a `TravelRequirements` dump).
     This is the primary output of the enrichment process.
     """
 
@@ -51,6 +109,32 @@ class AgentState:
     output: str = field(default=0)
     "The final research output"
 
+    time_to_first_token: float = field(default=None)
+    "Seconds from the start of the run to the first token of the report"
+
+
+@dataclass(kw_only=True)
+class ResearchQueryState:
+    """State sent to each parallel research branch."""
+
+    user_query: str
+    "query provided by the user."
+
+    query: str
+    "The search query researched by this branch"
+
+    seen_urls: list[str] = field(default_factory=list)
+    "URLs of sources already researched, skipped in incremental mode"
+
+    corridor: Optional[tuple[str, str]] = None
+    "Traveller's country and destination, keying the knowledge base"
+
+    started_at: Optional[float] = None
+    "When the conversation turn started, identifies the run in telemetry spans"
+
+    follow_up: bool = False
+    "Whether the query is one of reflection's gap queries, never answered from the knowledge base"
+
 
 @dataclass(kw_only=True)
 class OutputState:
@@ -63,5 +147,8 @@ class OutputState:
     output: str = field(default=0)
     "The final research output"
 
-    search_results: list[dict] = field(default=None)
-    "List of search results"
\ No newline at end of file
+    search_results: Annotated[list[dict], merge_search_results] = field(default=None)
+    "List of search results"
+
+    time_to_first_token: float = field(default=None)
+    "Seconds from the start of the run to the first token of the report"
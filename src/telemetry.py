@@ -0,0 +1,230 @@
+import functools
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from src.configuration import Configuration
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """Timing and counters of one node execution."""
+
+    name: str
+    run_id: Optional[str]
+    start_time: float
+    end_time: Optional[float] = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    def add(self, key: str, value: float) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+
+class NoOpExporter:
+    """Drops every span."""
+
+    def export(self, span: Span) -> None:
+        pass
+
+
+class InMemoryExporter:
+    """Keeps spans in a list, for tests and benchmarks."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class OpenTelemetryExporter:
+    """Re-emits spans through the OpenTelemetry tracer provider configured in the process."""
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._tracer = trace.get_tracer("travel_agent")
+
+    def export(self, span: Span) -> None:
+        attributes = {"run_id": span.run_id or "", **span.attributes}
+        otel_span = self._tracer.start_span(
+            span.name, start_time=int(span.start_time * 1e9), attributes=attributes
+        )
+        otel_span.end(end_time=int(span.end_time * 1e9))
+
+
+_exporters: dict[str, Any] = {}
+
+
+def get_exporter(name: str):
+    """
+    Return the process-wide span exporter by name.
+
+    Args:
+        name: "none", "memory" or "opentelemetry" (needs the `opentelemetry-api` package)
+    """
+    if name not in _exporters:
+        if name == "none":
+            _exporters[name] = NoOpExporter()
+        elif name == "memory":
+            _exporters[name] = InMemoryExporter()
+        elif name == "opentelemetry":
+            _exporters[name] = OpenTelemetryExporter()
+        else:
+            raise ValueError(f"Unknown telemetry exporter: {name}")
+    return _exporters[name]
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+# When each turn's latest node finished, to measure how long the next node waited to start
+_last_node_end: OrderedDict[str, float] = OrderedDict()
+_MAX_TRACKED_RUNS = 1024
+
+# Prompt and completion tokens each turn has spent so far, for per-run token budgets
+_run_tokens: OrderedDict[str, int] = OrderedDict()
+
+
+def record(key: str, value: float) -> None:
+    """Add a value to a counter of the span of the node currently running, if any"""
+    span = _current_span.get()
+    if span is not None:
+        span.add(key, value)
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Set an attribute of the span of the node currently running, if any"""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes[key] = value
+
+
+def prompt_prefix_hash(messages: list) -> str:
+    """Hash of the leading system messages, the part of a prompt the provider can cache"""
+    digest = hashlib.sha256()
+    for message in messages:
+        if getattr(message, "type", None) != "system":
+            break
+        digest.update(str(message.content).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def record_prompt_prefix(messages: list) -> None:
+    """
+    Add the prompt prefix hash of an LLM call to the span's `prompt_prefix_hashes`, so
+    prefixes can be checked to stay stable per node. A node making several calls (such as
+    the agent's intent check and history summary) keeps the distinct hash of each.
+    """
+    span = _current_span.get()
+    if span is not None:
+        hashes = span.attributes.setdefault("prompt_prefix_hashes", [])
+        prefix_hash = prompt_prefix_hash(messages)
+        if prefix_hash not in hashes:
+            hashes.append(prefix_hash)
+
+
+def record_usage(message: Any) -> None:
+    """Record prompt and completion token counts from a chat model response"""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        record("prompt_tokens", usage.get("input_tokens", 0))
+        record("completion_tokens", usage.get("output_tokens", 0))
+
+
+@contextmanager
+def timed(key: str):
+    """Add the wall time of the block to a counter of the current span"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(key, time.perf_counter() - started)
+
+
+def run_token_usage(started_at: Optional[float], config: RunnableConfig) -> int:
+    """Prompt and completion tokens spent by the nodes of the turn started at started_at"""
+    return _run_tokens.get(_run_key(started_at, config), 0)
+
+
+def _run_id(config: RunnableConfig) -> Optional[str]:
+    callbacks = config.get("callbacks")
+    run_id = getattr(callbacks, "parent_run_id", None)
+    return str(run_id) if run_id else None
+
+
+def _run_key(started_at: Optional[float], config: RunnableConfig) -> Optional[str]:
+    # A conversation turn is identified by its thread and the time the entry node started it
+    if started_at is None:
+        return None
+    thread_id = config.get("configurable", {}).get("thread_id")
+    return f"{thread_id}:{started_at}"
+
+
+def instrument_node(node, entry: bool = False):
+    """
+    Wrap a Langgraph node so each execution is exported as a span.
+
+    The span records the node's wall time, how long it waited after the previous node of
+    the same turn finished (`queue_seconds`), and every counter recorded while it ran
+    (LLM, search and formatting time, tokens, search result counts, ...).
+
+    Args:
+        node: Async node function taking the state and the config
+        entry: Whether the node starts a turn, so has no previous node to wait on
+    """
+
+    @functools.wraps(node)
+    async def wrapper(state, config: RunnableConfig, *args, **kwargs):
+        exporter = get_exporter(Configuration.from_runnable_config(config).telemetry_exporter)
+        span = Span(name=node.__name__, run_id=_run_id(config), start_time=time.time())
+        run_key = None if entry else _run_key(getattr(state, "started_at", None), config)
+        if run_key in _last_node_end:
+            span.attributes["queue_seconds"] = max(0.0, span.start_time - _last_node_end[run_key])
+
+        token = _current_span.set(span)
+        result = None
+        try:
+            result = await node(state, config, *args, **kwargs)
+            return result
+        finally:
+            _current_span.reset(token)
+            span.end_time = time.time()
+            if entry:
+                # The entry node stamps the turn's start time into the state it hands on
+                update = getattr(result, "update", None) or {}
+                run_key = _run_key(update.get("started_at"), config)
+            if run_key is not None:
+                _last_node_end[run_key] = span.end_time
+                _last_node_end.move_to_end(run_key)
+                while len(_last_node_end) > _MAX_TRACKED_RUNS:
+                    _last_node_end.popitem(last=False)
+                tokens = span.attributes.get("prompt_tokens", 0) + span.attributes.get(
+                    "completion_tokens", 0
+                )
+                if tokens:
+                    _run_tokens[run_key] = _run_tokens.get(run_key, 0) + tokens
+                    _run_tokens.move_to_end(run_key)
+                    while len(_run_tokens) > _MAX_TRACKED_RUNS:
+                        _run_tokens.popitem(last=False)
+            try:
+                exporter.export(span)
+            except Exception:
+                logger.exception("Failed to export span %s", span.name)
+
+    return wrapper
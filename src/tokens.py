@@ -0,0 +1,182 @@
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Encoding used by the gpt-4.1 family
+ENCODING_NAME = "o200k_base"
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+_TERM_PATTERN = re.compile(r"\w+")
+_PASSAGE_SPLIT = re.compile(r"\n\s*\n")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "for", "from", "i", "in",
+    "is", "it", "my", "of", "on", "or", "the", "to", "what", "when", "with", "you",
+}
+
+
+@lru_cache
+def get_encoding():
+    """
+    Return the tiktoken encoding, or None when it cannot be loaded.
+
+    tiktoken downloads its BPE file on first use; to run offline, pre-populate
+    `TIKTOKEN_CACHE_DIR`. Without it, token counts fall back to an estimate.
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as error:
+        logger.warning("Falling back to estimated token counts: %s", error)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text with the model tokenizer, or estimate them offline"""
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # Words of up to ~6 characters are usually a single token, punctuation is one each
+    return sum(max(1, math.ceil(len(piece) / 6)) for piece in _WORD_PATTERN.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text down to at most max_tokens tokens"""
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+    count = 0
+    for match in _WORD_PATTERN.finditer(text):
+        count += max(1, math.ceil(len(match.group()) / 6))
+        if count > max_tokens:
+            return text[: match.start()]
+    return text
+
+
+def content_words(text: str) -> list[str]:
+    """Lowercased words of a text, without stopwords, in order"""
+    return [term for term in _TERM_PATTERN.findall(text.lower()) if term not in _STOPWORDS]
+
+
+def query_terms(query: str) -> set[str]:
+    """Lowercased content words of a query"""
+    return set(content_words(query))
+
+
+def split_passages(text: str) -> list[str]:
+    """Split page content into paragraphs, falling back to lines for unbroken text"""
+    passages = [passage.strip() for passage in _PASSAGE_SPLIT.split(text) if passage.strip()]
+    if len(passages) <= 1:
+        passages = [line.strip() for line in text.splitlines() if line.strip()]
+    return passages
+
+
+def score_passage(passage: str, terms: set[str]) -> float:
+    """Query-term density of a passage; long passages are not rewarded for length alone"""
+    words = _TERM_PATTERN.findall(passage.lower())
+    if not words or not terms:
+        return 0.0
+    matches = sum(1 for word in words if word in terms)
+    return matches / math.sqrt(len(words))
+
+
+def select_passages(text: str, query: str, max_tokens: int) -> str:
+    """
+    Pick the passages of a text most relevant to the query within a token budget.
+
+    Passages are chosen by query-term density and returned in their original order, so
+    navigation menus and footers lose out to the paragraphs that actually answer the query.
+
+    Args:
+        text: Full page content
+        query: Text the passages should be relevant to
+        max_tokens: Token budget for the selected passages
+
+    Returns:
+        str: The selected passages, separated by ellipses where content was skipped
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    terms = query_terms(query)
+    passages = split_passages(text)
+    scores = [score_passage(passage, terms) for passage in passages]
+    if not any(scores):
+        return truncate_to_tokens(text, max_tokens)
+
+    # Passages without a single query term are boilerplate as far as this query goes
+    ranked = sorted(
+        (index for index in range(len(passages)) if scores[index] > 0),
+        key=lambda index: scores[index],
+        reverse=True,
+    )
+
+    selected: dict[int, str] = {}
+    remaining = max_tokens
+    for index in ranked:
+        if remaining <= 0:
+            break
+        tokens = count_tokens(passages[index])
+        if tokens <= remaining:
+            selected[index] = passages[index]
+            remaining -= tokens
+        elif not selected:
+            # The best passage alone is over budget: keep its head
+            selected[index] = truncate_to_tokens(passages[index], remaining)
+            remaining = 0
+
+    parts = []
+    previous: Optional[int] = None
+    for index in sorted(selected):
+        if previous is not None and index != previous + 1:
+            parts.append("...")
+        parts.append(selected[index])
+        previous = index
+    return "\n\n".join(parts)
+
+
+def allocate_token_budget(sources: list[dict], total_tokens: int) -> list[int]:
+    """
+    Spread a token budget over sources in proportion to their relevance score.
+
+    Budget a source cannot use (its content is shorter than its share) is handed on to
+    the remaining sources.
+
+    Args:
+        sources: Search results with `raw_content` and an optional relevance `score`
+        total_tokens: Token budget shared by all sources
+
+    Returns:
+        list[int]: Token budget per source, in the order of `sources`
+    """
+    needs = [count_tokens(source.get("raw_content") or "") for source in sources]
+    weights = [max(float(source.get("score") or 0), 0.01) for source in sources]
+    budgets = [0] * len(sources)
+
+    open_indexes = set(range(len(sources)))
+    remaining = total_tokens
+    while open_indexes and remaining > 0:
+        total_weight = sum(weights[index] for index in open_indexes)
+        shares = {
+            index: int(remaining * weights[index] / total_weight) for index in open_indexes
+        }
+        satisfied = {index for index in open_indexes if needs[index] <= shares[index]}
+        if not satisfied:
+            for index in open_indexes:
+                budgets[index] = shares[index]
+            break
+        for index in satisfied:
+            budgets[index] = needs[index]
+            remaining -= needs[index]
+        open_indexes -= satisfied
+
+    return budgets
@@ -1,19 +1,36 @@
 
 from datetime import datetime
+from typing import Optional
+
+from src.dedup import (
+    MIN_SIMHASH_WORDS,
+    NearDuplicateIndex,
+    canonicalize_url,
+    content_hash,
+    simhash,
+)
 
 # Get current date in a readable format
 def get_current_date():
     return datetime.now().strftime("%B %d, %Y")
 
 
-def deduplicate_sources(search_response: dict | list[dict]) -> list[dict]:
+def deduplicate_sources(
+    search_response: dict | list[dict], near_duplicate_distance: Optional[int] = 3
+) -> list[dict]:
     """
-    Takes either a single search response or list of responses from Tavily API and de-duplicates them based on the URL.
+    Takes either a single search response or list of responses from Tavily API and de-duplicates them.
+
+    Sources are duplicates when their canonical URLs match (ignoring tracking parameters,
+    fragments, trailing slashes, ...), when their content is identical, or when the SimHash
+    fingerprints of their content are within near_duplicate_distance bits (mirrored and
+    syndicated pages). The first occurrence is kept.
 
     Args:
         search_response: Either:
             - A dict with a 'results' key containing a list of search results
             - A list of dicts, each containing search results
+        near_duplicate_distance: Max differing SimHash bits for near-duplicates, None to only drop exact duplicates
 
     Returns:
         str: Formatted string with deduplicated sources
@@ -33,66 +50,38 @@ def deduplicate_sources(search_response: dict | list[dict]) -> list[dict]:
             "Input must be either a dict with 'results' or a list of search results"
         )
 
-    # Deduplicate by URL
     unique_urls = set()
+    unique_hashes = set()
+    near_duplicates = (
+        NearDuplicateIndex(near_duplicate_distance)
+        if near_duplicate_distance is not None
+        else None
+    )
     unique_sources_list = []
     for source in sources_list:
-        if source["url"] not in unique_urls:
-            unique_urls.add(source["url"])
-            unique_sources_list.append(source)
-
-    return unique_sources_list
+        # Deduplicate by URL
+        url = canonicalize_url(source["url"])
+        if url in unique_urls:
+            continue
 
+        # Deduplicate by content
+        text = source.get("raw_content") or source.get("content") or ""
+        digest = content_hash(text)
+        if text and digest in unique_hashes:
+            continue
 
-def format_sources(
-    sources_list: list[dict],
-    include_raw_content: bool = True,
-    max_tokens_per_source: int = 1000,
-) -> str:
-    """
-    Takes a list of unique results from Tavily API and formats them.
-    Limits the raw_content to approximately max_tokens_per_source.
-    include_raw_content specifies whether to include the raw_content from Tavily in the formatted string.
+        fingerprint = None
+        if near_duplicates is not None:
+            words = text.lower().split()
+            if len(words) >= MIN_SIMHASH_WORDS:
+                fingerprint = simhash(words)
+                if near_duplicates.find(fingerprint) is not None:
+                    continue
 
-    Args:
-        sources_list: list of unique results from Tavily API
-        max_tokens_per_source: int, maximum number of tokens per each search result to include in the formatted string
-        include_raw_content: bool, whether to include the raw_content from Tavily in the formatted string
+        unique_urls.add(url)
+        unique_hashes.add(digest)
+        if fingerprint is not None:
+            near_duplicates.add(fingerprint)
+        unique_sources_list.append(source)
 
-    Returns:
-        str: Formatted string with deduplicated sources
-    """
-    # Format output
-    formatted_text = "Sources:\n\n"
-    for source in sources_list:
-        formatted_text += f"Source {source['title']}:\n===\n"
-        formatted_text += f"URL: {source['url']}\n===\n"
-        formatted_text += (
-            f"Most relevant content from source: {source['content']}\n===\n"
-        )
-        if include_raw_content:
-            # Using rough estimate of 4 characters per token
-            char_limit = max_tokens_per_source * 4
-            # Handle None raw_content
-            raw_content = source.get("raw_content", "")
-            if raw_content is None:
-                raw_content = ""
-                print(f"Warning: No raw_content found for source {source['url']}")
-            if len(raw_content) > char_limit:
-                raw_content = raw_content[:char_limit] + "... [truncated]"
-            formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
-
-    return formatted_text.strip()
-
-
-def format_all_notes(completed_notes: list[str]) -> str:
-    """Format a list of notes into a string"""
-    formatted_str = ""
-    for idx, company_notes in enumerate(completed_notes, 1):
-        formatted_str += f"""
-{'='*60}
-Note: {idx}:
-{'='*60}
-Notes from research:
-{company_notes}"""
-    return formatted_str
\ No newline at end of file
+    return unique_sources_list
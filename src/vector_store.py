@@ -0,0 +1,417 @@
+import json
+import os
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from src.dedup import canonicalize_url, content_hash
+from src.router import find_countries
+from src.tokens import content_words, query_terms
+
+# Inflection endings dropped before comparing words, with what replaces them
+_SUFFIXES = (("ies", "y"), ("es", ""), ("s", ""), ("ing", ""), ("ed", ""))
+
+
+def stem(word: str) -> str:
+    """Light stem of a lowercased word, so that plurals and simple inflections match"""
+    if word.endswith("ss"):
+        return word
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)] + replacement
+    return word
+
+
+def chunk_text(text: str, chunk_words: int = 150, overlap_words: int = 30) -> list[str]:
+    """Split a text into overlapping chunks of about chunk_words words"""
+    words = text.split()
+    if len(words) <= chunk_words:
+        return [" ".join(words)] if words else []
+    step = max(1, chunk_words - overlap_words)
+    return [
+        " ".join(words[start : start + chunk_words])
+        for start in range(0, len(words) - overlap_words, step)
+    ]
+
+
+class HashingEmbeddings:
+    """
+    Local embedding: signed feature hashing of the content words of a text.
+
+    Deterministic across processes and free to compute, but only captures lexical overlap.
+
+    Args:
+        dimensions: Length of the embedding vectors
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.array(
+                [zlib.crc32(word.encode("utf-8")) for word in content_words(text)],
+                dtype=np.uint32,
+            )
+            if not len(hashes):
+                continue
+            signs = np.where(hashes & np.uint32(1 << 31), -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % self.dimensions, signs)
+        # Damp repeated terms, then normalize so dot products are cosine similarities
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class AzureEmbeddings:
+    """
+    Embeddings from an Azure OpenAI embedding deployment.
+
+    Args:
+        deployment: Deployment of a text-embedding-3 model
+        dimensions: Length the embedding vectors are shortened to
+    """
+
+    def __init__(self, deployment: str, dimensions: int = 256):
+        from langchain_openai import AzureOpenAIEmbeddings
+
+        self.dimensions = dimensions
+        self.name = f"{deployment}-{dimensions}"
+        self._embeddings = AzureOpenAIEmbeddings(azure_deployment=deployment, dimensions=dimensions)
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.array(await self._embeddings.aembed_documents(texts), dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@lru_cache
+def get_embeddings(provider: str, deployment: str, dimensions: int):
+    """Return the embedding model: "hashing" (local) or "azure" (the given deployment)"""
+    if provider == "hashing":
+        return HashingEmbeddings(dimensions)
+    if provider == "azure":
+        return AzureEmbeddings(deployment, dimensions)
+    raise ValueError(f"Unknown embedding provider: {provider}")
+
+
+class VectorIndex:
+    """
+    Brute-force vector index over chunks of fetched sources, persisted to a directory.
+
+    Vectors are kept in one contiguous float32 matrix, so a search is a single matrix-vector
+    product. Vectors and chunk metadata are appended to `vectors.f32` and `chunks.jsonl`,
+    so persisting new chunks costs only their own size.
+
+    Args:
+        path: Directory holding the index files
+        dimensions: Length of the embedding vectors
+    """
+
+    def __init__(self, path: str, dimensions: int):
+        self.path = path
+        self.dimensions = dimensions
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((1024, dimensions), dtype=np.float32)
+        self._created_at = np.zeros(1024, dtype=np.float64)
+        self._chunks: list[dict] = []
+        self._source_hashes: set[str] = set()
+
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._chunks_path = os.path.join(path, "chunks.jsonl")
+        self._load()
+
+    def _load(self) -> None:
+        # A purge interrupted after replacing the chunks is finished, one interrupted before
+        # replacing anything is dropped (see `purge`)
+        if os.path.exists(self._vectors_path + ".tmp"):
+            if os.path.exists(self._chunks_path + ".tmp"):
+                os.remove(self._chunks_path + ".tmp")
+                os.remove(self._vectors_path + ".tmp")
+            else:
+                os.replace(self._vectors_path + ".tmp", self._vectors_path)
+        if not os.path.exists(self._chunks_path) or not os.path.exists(self._vectors_path):
+            return
+        with open(self._chunks_path) as file:
+            chunks = [json.loads(line) for line in file if line.strip()]
+        vectors = np.fromfile(self._vectors_path, dtype=np.float32)
+        # An interrupted append leaves the two files out of step: keep the common prefix
+        count = min(len(chunks), len(vectors) // self.dimensions)
+        self._append_in_memory(
+            vectors[: count * self.dimensions].reshape(count, self.dimensions), chunks[:count]
+        )
+
+    def _append_in_memory(self, vectors: np.ndarray, chunks: list[dict]) -> None:
+        size = len(self._chunks)
+        needed = size + len(chunks)
+        if needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors))
+            self._vectors = np.resize(self._vectors, (capacity, self.dimensions))
+            self._created_at = np.resize(self._created_at, capacity)
+        self._vectors[size:needed] = vectors
+        self._created_at[size:needed] = [chunk["created_at"] for chunk in chunks]
+        self._chunks.extend(chunks)
+        self._source_hashes.update(chunk["source_hash"] for chunk in chunks)
+
+    def has_source(self, source_hash: str) -> bool:
+        return source_hash in self._source_hashes
+
+    def add(self, vectors: np.ndarray, chunks: list[dict]) -> None:
+        """Add chunk vectors with their metadata (url, title, text, source_hash) and persist them"""
+        if not chunks:
+            return
+        now = time.time()
+        chunks = [{**chunk, "created_at": now} for chunk in chunks]
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._append_in_memory(vectors, chunks)
+            with open(self._vectors_path, "ab") as file:
+                vectors.tofile(file)
+            with open(self._chunks_path, "a") as file:
+                file.writelines(json.dumps(chunk) + "\n" for chunk in chunks)
+
+    def stale_count(self, max_age_seconds: float) -> int:
+        """Number of chunks older than max_age_seconds"""
+        with self._lock:
+            cutoff = time.time() - max_age_seconds
+            return int((self._created_at[: len(self._chunks)] < cutoff).sum())
+
+    def purge(self, max_age_seconds: float) -> int:
+        """
+        Delete chunks older than max_age_seconds from memory and disk; returns how many.
+
+        The kept chunks are written to temporary files that replace the index files, chunks
+        first, so an interrupted purge is finished or dropped on the next load.
+        """
+        with self._lock:
+            size = len(self._chunks)
+            keep = self._created_at[:size] >= time.time() - max_age_seconds
+            removed = size - int(keep.sum())
+            if not removed:
+                return 0
+            vectors = np.ascontiguousarray(self._vectors[:size][keep])
+            chunks = [chunk for chunk, kept in zip(self._chunks, keep) if kept]
+
+            with open(self._vectors_path + ".tmp", "wb") as file:
+                vectors.tofile(file)
+                file.flush()
+                os.fsync(file.fileno())
+            with open(self._chunks_path + ".tmp", "w") as file:
+                file.writelines(json.dumps(chunk) + "\n" for chunk in chunks)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(self._chunks_path + ".tmp", self._chunks_path)
+            os.replace(self._vectors_path + ".tmp", self._vectors_path)
+
+            self._vectors = np.zeros((max(1024, len(chunks)), self.dimensions), dtype=np.float32)
+            self._created_at = np.zeros(len(self._vectors), dtype=np.float64)
+            self._chunks = []
+            self._source_hashes = set()
+            self._append_in_memory(vectors, chunks)
+            return removed
+
+    def search(
+        self, query_vectors: np.ndarray, k: int, max_age_seconds: Optional[float] = None
+    ) -> list[list[tuple[float, dict]]]:
+        """
+        Top-k chunks for each query vector.
+
+        Returns:
+            list: Per query, (cosine similarity, chunk) pairs, best first
+        """
+        with self._lock:
+            size = len(self._chunks)
+            if size == 0:
+                return [[] for _ in query_vectors]
+            scores = query_vectors @ self._vectors[:size].T
+            if max_age_seconds is not None:
+                stale = self._created_at[:size] < time.time() - max_age_seconds
+                scores[:, stale] = -np.inf
+            k = min(k, size)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for row, indexes in enumerate(top):
+                ordered = indexes[np.argsort(-scores[row, indexes])]
+                results.append(
+                    [
+                        (float(scores[row, index]), self._chunks[index])
+                        for index in ordered
+                        if np.isfinite(scores[row, index])
+                    ]
+                )
+            return results
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+
+class SourceRetriever:
+    """
+    Indexes the chunks of fetched sources and retrieves them for new search queries.
+
+    Args:
+        index: The vector index
+        embeddings: Embedding model matching the index dimensions
+        max_age_seconds: Age past which chunks are purged from the index, None to keep them
+    """
+
+    def __init__(self, index: VectorIndex, embeddings, max_age_seconds: Optional[float] = None):
+        self.index = index
+        self.embeddings = embeddings
+        self.max_age_seconds = max_age_seconds
+        if max_age_seconds is not None:
+            index.purge(max_age_seconds)
+
+    async def add_sources(self, sources: list[dict]) -> int:
+        """Chunk, embed and index sources not indexed yet; returns the number of new chunks"""
+        chunks = []
+        for source in sources:
+            text = source.get("raw_content") or source.get("content") or ""
+            source_hash = content_hash(f"{canonicalize_url(source['url'])}\n{text}")
+            if not text or self.index.has_source(source_hash):
+                continue
+            chunks.extend(
+                {
+                    "url": source["url"],
+                    "title": source.get("title") or "",
+                    "text": chunk,
+                    "source_hash": source_hash,
+                }
+                for chunk in chunk_text(text)
+            )
+        if chunks:
+            vectors = await self.embeddings.aembed(
+                [f"{chunk['title']}\n{chunk['text']}" for chunk in chunks]
+            )
+            self.index.add(vectors, chunks)
+            # Rewriting the index costs its whole size, so wait until half of it is stale
+            if (
+                self.max_age_seconds is not None
+                and 2 * self.index.stale_count(self.max_age_seconds) >= len(self.index)
+            ):
+                self.index.purge(self.max_age_seconds)
+        return len(chunks)
+
+    async def retrieve(
+        self,
+        queries: list[str],
+        k: int,
+        min_score: float,
+        max_age_seconds: float,
+        corridor: Optional[tuple[str, str]] = None,
+    ) -> list[Optional[dict]]:
+        """
+        Sources assembled from the top-k chunks of each query.
+
+        Only pages whose retrieved chunks name every country of the query and of the
+        corridor are used, so a page about another corridor never answers. A query is
+        answered from the index when such chunks score at least min_score and, between
+        them, contain every other content word of the query (whole words, compared by
+        `stem`), so a related page never stands in for a missing one.
+
+        Args:
+            queries: Search queries
+            k: Chunks retrieved per query
+            min_score: Min cosine similarity of a chunk
+            max_age_seconds: Age past which chunks are ignored
+            corridor: Traveller's country and destination (see `corridor_of`), if known
+
+        Returns:
+            list: Per query, a search response shaped like Tavily's (`{"results": [...]}`), or
+                None when the query should be searched on the web
+        """
+        if not queries or not len(self.index):
+            return [None] * len(queries)
+        hits = self.index.search(await self.embeddings.aembed(queries), k, max_age_seconds)
+
+        responses = []
+        for query, query_hits in zip(queries, hits):
+            mentions = find_countries(query)
+            countries = {country for country, *_ in mentions} | set(corridor or ())
+            # Country names are checked as countries, the remaining words as terms
+            country_words = set(
+                content_words(" ".join(query[start:end] for _, _, start, end in mentions))
+            )
+            terms = {stem(term) for term in query_terms(query) - country_words}
+
+            # Chunks of one page become a single source, in the order they were retrieved
+            sources: dict[str, dict] = {}
+            for score, chunk in query_hits:
+                if score < min_score:
+                    continue
+                source = sources.setdefault(
+                    chunk["url"],
+                    {"url": chunk["url"], "title": chunk["title"], "score": score, "chunks": []},
+                )
+                source["chunks"].append(chunk["text"])
+            sources = {
+                url: source
+                for url, source in sources.items()
+                if countries
+                <= {
+                    country
+                    for country, *_ in find_countries(
+                        " ".join([source["title"], *source["chunks"]])
+                    )
+                }
+            }
+
+            words = {
+                stem(word)
+                for source in sources.values()
+                for word in content_words(" ".join([source["title"], *source["chunks"]]))
+            }
+            if not sources or not terms <= words:
+                responses.append(None)
+                continue
+            responses.append(
+                {
+                    "results": [
+                        {
+                            "url": source["url"],
+                            "title": source["title"],
+                            "content": source["chunks"][0],
+                            "raw_content": "\n\n".join(source["chunks"]),
+                            "score": source["score"],
+                        }
+                        for source in sources.values()
+                    ]
+                }
+            )
+        return responses
+
+
+_retrievers: dict[tuple, SourceRetriever] = {}
+
+
+def get_retriever(
+    backend: str,
+    path: str,
+    provider: str,
+    deployment: str,
+    dimensions: int,
+    max_age_seconds: Optional[float] = None,
+) -> Optional[SourceRetriever]:
+    """
+    Return the process-wide source retriever, or None when backend is "none".
+
+    Each embedding model gets its own index under `path`, as their vectors do not mix.
+    Chunks older than max_age_seconds are purged when the index is opened and whenever
+    half of it has gone stale.
+    """
+    if backend == "none":
+        return None
+    if backend != "numpy":
+        raise ValueError(f"Unknown vector store backend: {backend}")
+    settings = (path, provider, deployment, int(dimensions), max_age_seconds)
+    if settings not in _retrievers:
+        embeddings = get_embeddings(provider, deployment, int(dimensions))
+        index = VectorIndex(os.path.join(path, embeddings.name), embeddings.dimensions)
+        _retrievers[settings] = SourceRetriever(index, embeddings, max_age_seconds)
+    return _retrievers[settings]
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+import src.cache
+from src.cache import InMemoryCache, SearchCache, SQLiteCache, TieredCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+class FakeSearchClient:
+    """Local search backend counting the searches that reach it"""
+
+    def __init__(self, delay: float = 0.0, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def search(self, query: str, **kwargs) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"query": query, "results": [{"url": f"https://example.com/{self.calls}"}]}
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(src.cache, "time", clock)
+    return clock
+
+
+def test_memory_entry_expires_after_ttl(clock):
+    cache = InMemoryCache(max_entries=10, ttl_seconds=60)
+    cache.set("key", "value")
+
+    clock.now += 60
+    assert cache.get("key") == "value"
+    clock.now += 1
+    assert cache.get("key") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_memory_evicts_least_recently_used(clock):
+    cache = InMemoryCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_sqlite_entry_expires_after_ttl(clock, tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    cache.set("key", {"value": 1})
+
+    clock.now += 30
+    assert cache.get("key") == {"value": 1}
+    clock.now += 31
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_tiered_promotion_keeps_disk_timestamp(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    TieredCache(InMemoryCache(10, 60), SQLiteCache(path, 60)).set("key", "value")
+
+    # A new process finds the entry on disk only, 50s after it was stored
+    clock.now += 50
+    cache = TieredCache(InMemoryCache(10, 60), SQLiteCache(path, 60))
+    assert cache.get("key") == "value"
+
+    clock.now += 11
+    assert cache.get("key") is None
+
+
+def test_search_cache_serves_repeat_queries(clock):
+    client = FakeSearchClient()
+    cache = SearchCache(InMemoryCache(10, 60))
+
+    async def run():
+        first = await cache.search(client, "Kenya UK visa", max_results=1)
+        second = await cache.search(client, "kenya  uk VISA", max_results=1)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert client.calls == 1
+
+
+@pytest.mark.parametrize("backend", [None, InMemoryCache(10, 60)])
+def test_search_cache_merges_in_flight_searches(backend):
+    client = FakeSearchClient(delay=0.05)
+    cache = SearchCache(backend)
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.search(client, "Kenya UK visa", max_results=1) for _ in range(5))
+        )
+
+    responses = asyncio.run(run())
+    assert client.calls == 1
+    assert cache.merged == 4
+    assert all(response == responses[0] for response in responses)
+
+
+def test_search_cache_merged_searches_share_the_error():
+    client = FakeSearchClient(delay=0.05, error=RuntimeError("search failed"))
+    cache = SearchCache(None)
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.search(client, "Kenya UK visa", max_results=1) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert client.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    # The failed search is not cached or left in flight
+    retry = FakeSearchClient()
+    response = asyncio.run(cache.search(retry, "Kenya UK visa", max_results=1))
+    assert retry.calls == 1
+    assert response["results"]
@@ -0,0 +1,163 @@
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import END, START, StateGraph
+
+from src.checkpoint import RAW_CONTENT_REF, SQLiteCheckpointer
+
+
+class State(TypedDict):
+    steps: Annotated[list[str], operator.add]
+    search_results: list[dict]
+
+
+def build_graph(checkpointer: SQLiteCheckpointer, fail_times: int = 0):
+    """plan fans out to search and summarize; summarize raises its first fail_times runs"""
+    calls = {"plan": 0, "search": 0, "summarize": 0, "report": 0}
+
+    def plan(state: State) -> dict:
+        calls["plan"] += 1
+        return {"steps": ["plan"]}
+
+    def search(state: State) -> dict:
+        calls["search"] += 1
+        return {
+            "steps": ["search"],
+            "search_results": [
+                {"url": "https://example.com", "content": "visa", "raw_content": "visa " * 500}
+            ],
+        }
+
+    def summarize(state: State) -> dict:
+        calls["summarize"] += 1
+        if calls["summarize"] <= fail_times:
+            raise RuntimeError("summarize failed")
+        return {"steps": ["summarize"]}
+
+    def report(state: State) -> dict:
+        calls["report"] += 1
+        return {"steps": ["report"]}
+
+    builder = StateGraph(State)
+    builder.add_node("plan", plan)
+    builder.add_node("search", search)
+    builder.add_node("summarize", summarize)
+    builder.add_node("report", report)
+    builder.add_edge(START, "plan")
+    builder.add_edge("plan", "search")
+    builder.add_edge("plan", "summarize")
+    builder.add_edge(["search", "summarize"], "report")
+    builder.add_edge("report", END)
+    return builder.compile(checkpointer=checkpointer), calls
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "checkpoints" / "graph.sqlite")
+
+
+def thread(thread_id: str = "thread-1") -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def test_state_round_trips_through_a_new_connection(path):
+    graph, _ = build_graph(SQLiteCheckpointer(path))
+    result = graph.invoke({"steps": [], "search_results": []}, thread())
+
+    reopened, _ = build_graph(SQLiteCheckpointer(path))
+    state = reopened.get_state(thread())
+    assert state.values == result
+    assert state.values["steps"][0] == "plan" and state.values["steps"][-1] == "report"
+    assert state.values["search_results"][0]["raw_content"] == "visa " * 500
+    assert state.next == ()
+
+
+def test_put_and_get_tuple_round_trip(path):
+    saver = SQLiteCheckpointer(path)
+    checkpoint = empty_checkpoint()
+    results = [{"url": "https://example.com", "raw_content": "entry rules " * 100}]
+    checkpoint["channel_values"] = {"steps": ["plan"], "search_results": results}
+    checkpoint["channel_versions"] = {"steps": "1", "search_results": "1"}
+    config = {"configurable": {"thread_id": "thread-1", "checkpoint_ns": ""}}
+
+    stored = saver.put(
+        config, checkpoint, {"source": "loop", "step": 0}, checkpoint["channel_versions"]
+    )
+
+    checkpoint_tuple = SQLiteCheckpointer(path).get_tuple(stored)
+    assert checkpoint_tuple.config == stored
+    assert checkpoint_tuple.checkpoint["id"] == checkpoint["id"]
+    assert checkpoint_tuple.checkpoint["channel_values"] == {
+        "steps": ["plan"],
+        "search_results": results,
+    }
+    assert checkpoint_tuple.metadata["source"] == "loop"
+    assert checkpoint_tuple.parent_config is None
+    # The raw content is stored in a blob of its own and put back on load
+    [loaded] = checkpoint_tuple.checkpoint["channel_values"]["search_results"]
+    assert RAW_CONTENT_REF not in loaded
+
+
+def test_failed_run_resumes_from_the_last_completed_node(path):
+    graph, calls = build_graph(SQLiteCheckpointer(path), fail_times=1)
+
+    with pytest.raises(RuntimeError, match="summarize failed"):
+        graph.invoke({"steps": [], "search_results": []}, thread())
+    # The search that succeeded next to the failed task was saved as a pending write
+    assert graph.get_state(thread()).next == ("summarize",)
+
+    result = graph.invoke(None, thread())
+
+    assert calls == {"plan": 1, "search": 1, "summarize": 2, "report": 1}
+    assert sorted(result["steps"]) == ["plan", "report", "search", "summarize"]
+    assert result["search_results"][0]["url"] == "https://example.com"
+
+
+def test_list_filters_by_before_metadata_and_limit(path):
+    saver = SQLiteCheckpointer(path)
+    graph, _ = build_graph(saver)
+    graph.invoke({"steps": [], "search_results": []}, thread("thread-1"))
+    graph.invoke({"steps": [], "search_results": []}, thread("thread-2"))
+
+    history = list(saver.list(thread("thread-1")))
+    ids = [checkpoint_tuple.config["configurable"]["checkpoint_id"] for checkpoint_tuple in history]
+    assert ids == sorted(ids, reverse=True)
+    assert len(list(saver.list(None))) == 2 * len(history)
+
+    before = list(saver.list(thread("thread-1"), before=history[1].config))
+    assert [checkpoint_tuple.config for checkpoint_tuple in before] == [
+        checkpoint_tuple.config for checkpoint_tuple in history[2:]
+    ]
+
+    inputs = list(saver.list(thread("thread-1"), filter={"source": "input"}))
+    assert len(inputs) == 1 and inputs[0].parent_config is None
+
+    limited = list(saver.list(thread("thread-1"), limit=2))
+    assert [checkpoint_tuple.config for checkpoint_tuple in limited] == [
+        checkpoint_tuple.config for checkpoint_tuple in history[:2]
+    ]
+
+
+def test_pending_writes_are_returned_with_their_checkpoint(path):
+    saver = SQLiteCheckpointer(path)
+    checkpoint = empty_checkpoint()
+    config = saver.put(
+        {"configurable": {"thread_id": "thread-1", "checkpoint_ns": ""}},
+        checkpoint,
+        {"source": "loop", "step": 1},
+        {},
+    )
+
+    saver.put_writes(config, [("steps", ["search"]), ("search_results", [])], task_id="task-a")
+    saver.put_writes(config, [("steps", ["summarize"])], task_id="task-b")
+    # Writes of a task already stored are not duplicated when it is replayed
+    saver.put_writes(config, [("steps", ["search"]), ("search_results", [])], task_id="task-a")
+
+    pending = SQLiteCheckpointer(path).get_tuple(config).pending_writes
+    assert pending == [
+        ("task-a", "steps", ["search"]),
+        ("task-a", "search_results", []),
+        ("task-b", "steps", ["summarize"]),
+    ]